@@ -1,24 +1,35 @@
-from fastapi import FastAPI, UploadFile, File, Form
-from review_model import review_pdf
-import shutil
-import os
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi.responses import Response, StreamingResponse
+from typing import List
+from review_model import review_pdf_cached, get_review_cache, parse_stages, resolve_stages
+from jobs import JobQueue, QueueFull
+from executors import get_cpu_pool, run_io, shutdown as shutdown_executors
+from uploads import UploadTooLarge, read_upload, expand_uploads
+from batch_review import review_batch, to_ndjson
+from online_plagiarism import lookup_cache_stats
+import llm_client
+import metrics
 
 app = FastAPI()
+app.add_middleware(metrics.MetricsMiddleware)
+job_queue = JobQueue()
 
 @app.post("/analyze")
 async def analyze_paper(
     file: UploadFile = File(...), 
-    rewrite: bool = Form(True)
+    rewrite: bool = Form(True),
+    no_cache: bool = Form(False),
+    stages: str = Form("")
 ):
-    # Save uploaded file temporarily
-    temp_filename = f"temp_{file.filename}"
-    with open(temp_filename, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    content = await _read_pdf(file)
+    stage_list = _check_stages(stages, rewrite)
 
     try:
         # Call your existing logic
         # Ensure ollama is running: 'ollama serve'
-        results = review_pdf(temp_filename, rewrite=rewrite, ollama_model="llama3.1:8b")
+        # The review blocks, so it runs on the IO pool (CPU phase on the process
+        # pool) and the event loop keeps serving other requests meanwhile.
+        results = await run_io(review_upload, content, rewrite, no_cache, stage_list)
 
         # 🟢 CHANGED: Return the FULL results dictionary (JSON)
         # This allows the app to see scores, verdicts, and graphs.
@@ -26,8 +37,107 @@ async def analyze_paper(
         
     except Exception as e:
         return {"error": str(e)}
-    finally:
-        if os.path.exists(temp_filename):
-            os.remove(temp_filename)
+
+async def _read_pdf(file: UploadFile) -> bytes:
+    # The PDF stays in memory: no temp files, no clashes between equal filenames
+    try:
+        return await read_upload(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+def _check_stages(stages: str, rewrite: bool = True):
+    # Comma-separated subset of review_model.STAGES; empty runs everything
+    try:
+        stage_list = parse_stages(stages)
+        resolve_stages(stage_list, rewrite=rewrite)
+        return stage_list
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def review_upload(content: bytes, rewrite: bool, no_cache: bool, stages=None, on_event=None):
+    # no_cache=True forces a fresh review (the result still refreshes the cache)
+    return review_pdf_cached(content, rewrite=rewrite, ollama_model="llama3.1:8b", use_cache=not no_cache,
+                             on_event=on_event, cpu_pool=get_cpu_pool(), stages=stages)
+
+# ---------- batch mode: many PDFs (or ZIPs of PDFs), NDJSON out ----------
+@app.post("/analyze/batch")
+async def analyze_batch(
+    files: List[UploadFile] = File(...),
+    rewrite: bool = Form(True),
+    no_cache: bool = Form(False),
+    stages: str = Form("")
+):
+    """
+    One NDJSON line per paper as it finishes, then a summary line.
+    """
+    try:
+        papers = expand_uploads([(f.filename, await read_upload(f)) for f in files])
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    stage_list = _check_stages(stages, rewrite)
+
+    def stream():
+        failed = 0
+        for record in review_batch(papers, rewrite=rewrite, ollama_model="llama3.1:8b",
+                                   use_cache=not no_cache, stages=stage_list):
+            failed += record["status"] == "failed"
+            yield to_ndjson(record)
+        yield to_ndjson({"summary": True, "papers": len(papers), "failed": failed})
+
+    # A sync generator is iterated in a worker thread, so the event loop stays free
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+@app.on_event("shutdown")
+async def _shutdown_pools():
+    shutdown_executors()
+    await llm_client.aclose()
+    llm_client.close()
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {"reviews": get_review_cache().stats(), "llm": llm_client.cache_stats(),
+            "plagiarism": lookup_cache_stats()}
+
+@app.get("/metrics")
+def metrics_endpoint():
+    # Prometheus text format: stage/LLM latency, tokens/s, in-flight requests, cache ratios
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+# ---------- job mode: submit now, poll later ----------
+@app.post("/jobs")
+async def submit_job(
+    file: UploadFile = File(...),
+    rewrite: bool = Form(True),
+    no_cache: bool = Form(False),
+    stages: str = Form("")
+):
+    content = await _read_pdf(file)
+    stage_list = _check_stages(stages, rewrite)
+
+    def run(on_event):
+        return review_upload(content, rewrite, no_cache, stage_list, on_event=on_event)
+
+    try:
+        job = job_queue.submit(run, label=file.filename)
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}
+
+@app.get("/jobs/stats")
+def job_stats():
+    return job_queue.stats()
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job id")
+    return job.to_dict()
 
 # Run with: uvicorn api:app --host 0.0.0.0 --port 8000
\ No newline at end of file
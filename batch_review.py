@@ -0,0 +1,164 @@
+import json
+import os
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import llm_client
+from executors import get_cpu_pool
+from pdf_extraction import PdfSource, extract_text_from_pdf, load_pdf_source
+from review_cache import sha256_source
+from review_model import (REWRITE_TOP_N, get_review_cache, is_cacheable, review_key, review_pdf,
+                          run_heuristic_phase_batch)
+
+# -----------------------
+# Batch settings
+# -----------------------
+# Papers whose LLM phase runs at once; Ollama traffic is still capped by llm_client's limiter
+BATCH_WORKERS = int(os.environ.get("REVIEWER_BATCH_WORKERS", str(llm_client.LLM_CONCURRENCY)))
+# Papers whose sections share one nlp.pipe call
+BATCH_NLP_CHUNK = int(os.environ.get("REVIEWER_BATCH_NLP_CHUNK", "8"))
+# spaCy worker processes per nlp.pipe call
+BATCH_NLP_PROCESSES = int(os.environ.get("REVIEWER_BATCH_NLP_PROCESSES", "1"))
+
+
+def _record(index: int, filename: str, started: float, result=None, error: Optional[str] = None,
+            timings: Optional[dict] = None) -> dict:
+    out = {"index": index, "filename": filename, "status": "failed" if error else "done",
+           "seconds": round(time.time() - started, 3)}
+    if timings is not None:
+        out["timings"] = {stage: round(sec, 4) for stage, sec in timings.items()}
+    if error:
+        out["error"] = error
+    else:
+        out["result"] = result
+    return out
+
+
+def _extract_timed(source) -> Tuple[str, float]:
+    # Runs on the CPU pool; returns the worker's own extraction time
+    t0 = time.perf_counter()
+    return extract_text_from_pdf(source), time.perf_counter() - t0
+
+
+def _extract_result(fut, source) -> Tuple[str, float]:
+    try:
+        return fut.result()
+    except BrokenProcessPool:
+        # A worker died; extract here rather than fail the paper
+        return _extract_timed(source)
+
+
+def review_batch(papers: List[Tuple[str, PdfSource]], rewrite: bool = True, ollama_model: str = "llama3.1:8b",
+                 use_cache: bool = True, workers: int = BATCH_WORKERS, nlp_chunk: int = BATCH_NLP_CHUNK,
+                 n_process: int = BATCH_NLP_PROCESSES, stages: Optional[List[str]] = None,
+                 rewrite_limit: Optional[int] = REWRITE_TOP_N,
+                 finish: Optional[Callable[[dict, float], dict]] = None) -> Iterator[dict]:
+    """
+    Reviews many (filename, pdf) pairs and yields one record per paper as
+    soon as it is done, in completion order:
+        {"index", "filename", "status": "done"|"failed", "seconds", "timings", "result"|"error"}
+    "timings" holds per-stage seconds ({"cache": ...} for cache hits).
+
+    Cache hits come back first. The rest are extracted on the shared CPU
+    pool, the next chunk while the current one is sentence-split (`nlp_chunk`
+    papers at a time through one nlp.pipe call), and their LLM phase fans
+    out over `workers` threads. A failing paper only fails its
+    own record. `stages` and `rewrite_limit` are passed to review_pdf.
+    `finish(result, started_at)` may reshape each fresh or cached result
+    before it is yielded.
+    """
+    cache = get_review_cache()
+    started = time.time()
+
+    pending = []
+    for index, (filename, source) in enumerate(papers):
+        t0 = time.perf_counter()
+        try:
+            source = load_pdf_source(source)
+            key = review_key(sha256_source(source), ollama_model, rewrite, stages, rewrite_limit)
+        except Exception as e:
+            yield _record(index, filename, started, error=str(e))
+            continue
+        cached = cache.get(key) if use_cache else None
+        if cached is not None:
+            yield _record(index, filename, started, finish(cached, started) if finish else cached,
+                          timings={"cache": time.perf_counter() - t0})
+        else:
+            pending.append((index, filename, source, key))
+
+    timings = {}
+
+    def llm_phase(index, source, key, v1):
+        result = review_pdf(source, rewrite=rewrite, ollama_model=ollama_model, heuristics=v1,
+                            stages=stages, rewrite_limit=rewrite_limit)
+        # The remaining stages overlap, so these are per-stage wall times, not slices of one clock
+        timings[index].update({stage: t["wall"] for stage, t in result["meta"]["stages"].items()})
+        if is_cacheable(result):
+            cache.put(key, result)
+        return finish(result, started) if finish else result
+
+    futures = {}
+
+    def drain(block: bool):
+        if not futures:
+            return
+        done, _ = wait(list(futures), timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for fut in done:
+            index, filename = futures.pop(fut)
+            try:
+                yield _record(index, filename, started, fut.result(), timings=timings.pop(index))
+            except Exception as e:
+                print(f"❌ Batch review of {filename} failed:", traceback.format_exc())
+                yield _record(index, filename, started, error=str(e), timings=timings.pop(index))
+
+    size = max(1, nlp_chunk)
+    chunks = [pending[offset:offset + size] for offset in range(0, len(pending), size)]
+
+    def submit_extraction(papers):
+        cpu_pool = get_cpu_pool()
+        return [(paper, cpu_pool.submit(_extract_timed, paper[2])) for paper in papers]
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        extracting = submit_extraction(chunks[0]) if chunks else []
+        for n, papers in enumerate(chunks):
+            current = extracting
+            # The next chunk is extracted on the CPU pool while this one goes through spaCy
+            extracting = submit_extraction(chunks[n + 1]) if n + 1 < len(chunks) else []
+            chunk, texts = [], []
+            for (index, filename, source, key), fut in current:
+                try:
+                    text, seconds = _extract_result(fut, source)
+                except Exception as e:
+                    yield _record(index, filename, started, error=f"extraction failed: {e}")
+                    continue
+                texts.append(text)
+                chunk.append((index, filename, source, key))
+                timings[index] = {"extract": seconds}
+
+            t0 = time.perf_counter()
+            try:
+                heuristics = run_heuristic_phase_batch(texts, n_process)
+            except Exception as e:
+                print("❌ Batch heuristics failed:", traceback.format_exc())
+                for index, filename, _, _ in chunk:
+                    yield _record(index, filename, started, error=str(e), timings=timings.pop(index))
+                continue
+
+            # One nlp.pipe call served the whole chunk; charge each paper its share
+            share = (time.perf_counter() - t0) / max(1, len(chunk))
+            for (index, filename, source, key), v1 in zip(chunk, heuristics):
+                timings[index]["heuristics"] = share
+                futures[pool.submit(llm_phase, index, source, key, v1)] = (index, filename)
+
+            # Hand back whatever finished while this chunk was being split
+            yield from drain(block=False)
+
+        while futures:
+            yield from drain(block=True)
+
+
+def to_ndjson(record: dict) -> str:
+    return json.dumps(record, ensure_ascii=False) + "\n"
@@ -0,0 +1,74 @@
+"""
+Benchmark: N papers reviewed one after another (what N sequential /analyze
+calls amount to) against review_batch, which batches sentence splitting
+through nlp.pipe and overlaps the papers' LLM phases. Also reports the
+time until the first batch record is available. Needs a running Ollama;
+the review and LLM response caches are bypassed.
+
+Run from the repo root (OLLAMA_URL selects the server):
+    python benchmarks/bench_batch.py paper.pdf --papers 16 --workers 4
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import executors
+import llm_client
+from batch_review import review_batch
+from review_model import review_pdf, run_extract_phase
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf")
+    parser.add_argument("--papers", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--nlp-processes", type=int, default=1)
+    parser.add_argument("--no-rewrite", action="store_true")
+    parser.add_argument("--out", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    llm_client.LLM_CACHE_ENABLED = False
+    with open(args.pdf, "rb") as f:
+        content = f.read()
+    # Distinct bytes per paper so nothing is shared through content hashes
+    papers = [(f"paper_{i}.pdf", content + f"\n%{i}".encode()) for i in range(args.papers)]
+    rewrite = not args.no_rewrite
+    # Worker start-up (spawn + imports) stays out of the batch numbers, as in a running server
+    for fut in [executors.get_cpu_pool().submit(run_extract_phase, content) for _ in range(executors.CPU_WORKERS)]:
+        fut.result()
+
+    t0 = time.perf_counter()
+    for _, pdf in papers:
+        review_pdf(pdf, rewrite=rewrite)
+    sequential = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    first = None
+    failed = 0
+    for record in review_batch(papers, rewrite=rewrite, use_cache=False,
+                               workers=args.workers, n_process=args.nlp_processes):
+        first = first or time.perf_counter() - t0
+        failed += record["status"] == "failed"
+    batched = time.perf_counter() - t0
+
+    result = {
+        "papers": args.papers, "workers": args.workers, "nlp_processes": args.nlp_processes,
+        "sequential_s": sequential, "batch_s": batched, "batch_first_record_s": first,
+        "speedup": sequential / batched, "failed": failed,
+    }
+    print(f"sequential: {sequential:.2f}s ({args.papers / sequential:.2f} papers/s)")
+    print(f"batch:      {batched:.2f}s ({args.papers / batched:.2f} papers/s), "
+          f"first record after {first:.2f}s, speedup x{result['speedup']:.2f}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
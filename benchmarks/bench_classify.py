@@ -0,0 +1,107 @@
+"""
+Benchmark: Aho-Corasick lexicon matcher vs. the original substring scan
+used by classify_sentences.
+
+Run from the repo root:
+    python benchmarks/bench_classify.py --sentences 20000 --extra-patterns 500
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexicon_matcher import LexiconMatcher
+from review_model import STRENGTH_PATTERNS, WEAKNESS_PATTERNS, IMPROVEMENT_PATTERNS
+
+FILLER = (
+    "the proposed model is evaluated on three benchmarks and the results are "
+    "reported with standard deviations over five random seeds for each setting"
+).split()
+
+
+def substring_classify(sentences, strengths_p, weaknesses_p, improvements_p):
+    """The pre-automaton implementation, kept here as the baseline."""
+    strengths, weaknesses, improvements = [], [], []
+    for sent in sentences:
+        sent_lower = sent.lower()
+        if any(pat in sent_lower for pat in strengths_p):
+            strengths.append(sent)
+        elif any(pat in sent_lower for pat in weaknesses_p):
+            weaknesses.append(sent)
+        elif any(pat in sent_lower for pat in improvements_p):
+            improvements.append(sent)
+    return strengths, weaknesses, improvements
+
+
+def automaton_classify(sentences, matcher):
+    buckets = {cat: [] for cat in matcher.categories}
+    for sent in sentences:
+        hit = matcher.classify(sent)
+        if hit:
+            buckets[hit.category].append(sent)
+    return tuple(buckets[cat] for cat in matcher.categories)
+
+
+def make_lexicons(extra: int, rng: random.Random):
+    def synth(prefix):
+        return [f"{prefix} {rng.choice(FILLER)} {rng.randint(0, 10**6)}" for _ in range(extra)]
+    return (
+        STRENGTH_PATTERNS + synth("strongly"),
+        WEAKNESS_PATTERNS + synth("weakly"),
+        IMPROVEMENT_PATTERNS + synth("later"),
+    )
+
+
+def make_sentences(n: int, lexicons, rng: random.Random):
+    all_patterns = [p for lex in lexicons for p in lex]
+    sentences = []
+    for _ in range(n):
+        words = [rng.choice(FILLER) for _ in range(rng.randint(12, 30))]
+        if rng.random() < 0.3:
+            words.insert(rng.randrange(len(words)), rng.choice(all_patterns))
+        sentences.append(" ".join(words).capitalize() + ".")
+    return sentences
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, default=20000)
+    parser.add_argument("--extra-patterns", type=int, nargs="+", default=[0, 100, 1000],
+                        help="synthetic phrases added to each lexicon")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'patterns':>9} {'substring s':>12} {'automaton s':>12} {'speedup':>8}")
+    for extra in args.extra_patterns:
+        rng = random.Random(args.seed)
+        lexicons = make_lexicons(extra, rng)
+        sentences = make_sentences(args.sentences, lexicons, rng)
+
+        t0 = time.perf_counter()
+        matcher = LexiconMatcher(dict(zip(["strength", "weakness", "improvement"], lexicons)))
+        compile_s = time.perf_counter() - t0
+
+        baseline = substring_classify(sentences, *lexicons)
+        assert automaton_classify(sentences, matcher) == baseline, "matcher disagrees with substring scan"
+
+        t_sub = best_of(lambda: substring_classify(sentences, *lexicons), args.repeat)
+        t_ac = best_of(lambda: automaton_classify(sentences, matcher), args.repeat)
+        n_patterns = sum(len(lex) for lex in lexicons)
+        print(f"{n_patterns:>9} {t_sub:>12.4f} {t_ac:>12.4f} {t_sub / t_ac:>7.2f}x  (compile {compile_s * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
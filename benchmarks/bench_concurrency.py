@@ -0,0 +1,117 @@
+"""
+Concurrency check: fires several /analyze uploads at once against a live
+uvicorn instance of the app and keeps polling /health meanwhile. With the
+review off the event loop, uploads overlap and /health stays fast; the run
+exits with status 1 if any upload fails, uploads did not overlap, or a
+/health poll took longer than --max-health-ms. The LLM response cache is
+off and caches live in a temp dir, so every upload reaches the LLM.
+
+Run from the repo root (point OLLAMA_URL at Ollama or a stand-in):
+    python benchmarks/bench_concurrency.py paper.pdf --app server:app --uploads 4
+"""
+import argparse
+import importlib
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+import uvicorn
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def isolate_caches():
+    """Review and LLM caches off the real .review_cache; no LLM reply is served from cache."""
+    os.environ["REVIEWER_LLM_CACHE"] = "0"
+    os.environ["REVIEWER_CACHE_DIR"] = tempfile.mkdtemp(prefix="review_cache_")
+    import llm_client
+    llm_client.LLM_CACHE_ENABLED = False
+
+
+def start_app(app_ref: str, port: int) -> uvicorn.Server:
+    module, attr = app_ref.split(":")
+    app = getattr(importlib.import_module(module), attr)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf")
+    parser.add_argument("--app", default="server:app")
+    parser.add_argument("--uploads", type=int, default=4)
+    parser.add_argument("--max-health-ms", type=float, default=500.0, help="slowest acceptable /health poll")
+    args = parser.parse_args()
+
+    # Before the app is imported, so nothing reads the real cache
+    isolate_caches()
+    port = free_port()
+    server = start_app(args.app, port)
+    base = f"http://127.0.0.1:{port}"
+    with open(args.pdf, "rb") as f:
+        pdf = f.read()
+
+    def upload(idx):
+        t0 = time.perf_counter()
+        # no_cache so every upload does the full pipeline
+        r = requests.post(f"{base}/analyze", files={"file": (f"paper_{idx}.pdf", pdf)},
+                          data={"rewrite": "false", "no_cache": "true"})
+        return t0, time.perf_counter(), r.status_code
+
+    health = []
+    done = threading.Event()
+
+    def poll_health():
+        while not done.is_set():
+            t0 = time.perf_counter()
+            requests.get(f"{base}/health", timeout=30)
+            health.append(time.perf_counter() - t0)
+            time.sleep(0.05)
+
+    poller = threading.Thread(target=poll_health)
+    poller.start()
+    t_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.uploads) as pool:
+        spans = list(pool.map(upload, range(args.uploads)))
+    wall = time.perf_counter() - t_start
+    done.set()
+    poller.join()
+    server.should_exit = True
+
+    durations = [end - start for start, end, _ in spans]
+    # Uploads overlapped if the last one started before the first one finished
+    overlapped = max(s for s, _, _ in spans) < min(e for _, e, _ in spans)
+    print(f"uploads: {args.uploads}  wall: {wall:.2f}s  sum of request times: {sum(durations):.2f}s")
+    print(f"status codes: {sorted(set(c for _, _, c in spans))}  overlapped: {overlapped}")
+    print(f"/health polls: {len(health)}  max latency: {max(health) * 1000:.1f} ms")
+
+    failures = []
+    if any(code != 200 for _, _, code in spans):
+        failures.append("an upload did not return 200")
+    if args.uploads > 1 and not overlapped:
+        failures.append("uploads ran one after another")
+    if max(health) * 1000 > args.max_health_ms:
+        failures.append(f"/health took {max(health) * 1000:.1f} ms (limit {args.max_health_ms:.0f} ms)")
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ uploads overlapped and /health stayed responsive")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: serial vs. process-pool PDF text extraction at several page counts,
+to locate the PARALLEL_MIN_PAGES crossover on this machine. The pool is the
+shared executors.get_cpu_pool(), warmed up before timing, as in the server.
+Prints the REVIEWER_PARALLEL_MIN_PAGES setting to use, or that parallel
+extraction never paid off (leave it unset).
+
+Run from the repo root:
+    python benchmarks/bench_extract.py --pages 10 100 500 --workers 4
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz  # PyMuPDF
+
+import executors
+from pdf_extraction import extract_text_from_pdf, extract_text_parallel
+
+LINE = "The proposed method outperforms the baseline on every benchmark we evaluated. "
+
+
+def make_pdf(path: str, n_pages: int):
+    with fitz.open() as doc:
+        for idx in range(n_pages):
+            page = doc.new_page()
+            page.insert_textbox(fitz.Rect(50, 50, 550, 800), f"Page {idx + 1}\n" + LINE * 40, fontsize=9)
+        doc.save(path)
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--workers", type=int, default=executors.CPU_WORKERS,
+                        help="page chunks; the pool has REVIEWER_CPU_WORKERS processes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--min-gain", type=float, default=0.1,
+                        help="parallel must be this much faster to count as a win (default 0.1 = 10%%)")
+    parser.add_argument("--out", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    rows = []
+    print(f"workers={args.workers} pool={executors.CPU_WORKERS} cpus={os.cpu_count()}")
+    executors.get_cpu_pool().submit(int).result()  # process start-up stays out of the numbers
+    print(f"{'pages':>6} {'serial s':>9} {'parallel s':>11} {'serial p/s':>11} {'parallel p/s':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.pages:
+            path = os.path.join(tmp, f"bench_{n}.pdf")
+            make_pdf(path, n)
+            assert extract_text_parallel(path, args.workers) == extract_text_from_pdf(path)
+            t_serial = best_of(lambda: extract_text_from_pdf(path), args.repeat)
+            t_parallel = best_of(lambda: extract_text_parallel(path, args.workers), args.repeat)
+            rows.append({"pages": n, "serial_s": t_serial, "parallel_s": t_parallel})
+            print(f"{n:>6} {t_serial:>9.3f} {t_parallel:>11.3f} {n / t_serial:>11.0f} {n / t_parallel:>13.0f}")
+
+    # Smallest size from which parallel clearly wins at every larger size measured
+    crossover = None
+    for row in sorted(rows, key=lambda r: r["pages"], reverse=True):
+        if args.workers < 2 or row["parallel_s"] > row["serial_s"] * (1 - args.min_gain):
+            break
+        crossover = row["pages"]
+    if crossover is None:
+        print("\nParallel extraction never beat serial here; leave REVIEWER_PARALLEL_MIN_PAGES unset.")
+    else:
+        print(f"\nParallel wins from {crossover} pages: REVIEWER_PARALLEL_MIN_PAGES={crossover}")
+    executors.shutdown()
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"workers": args.workers, "cpu_workers": executors.CPU_WORKERS, "cpus": os.cpu_count(),
+                       "crossover_pages": crossover, "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
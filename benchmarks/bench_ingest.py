@@ -0,0 +1,87 @@
+"""
+Benchmark: per-request ingestion latency of an uploaded PDF, comparing the
+old temp-file path (write to disk, extract from the path, delete) against
+opening the uploaded bytes directly in memory.
+
+Run from the repo root:
+    python benchmarks/bench_ingest.py --pages 5 20 100 --repeat 20
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz  # PyMuPDF
+
+from pdf_extraction import extract_text_from_pdf
+from review_cache import sha256_file, sha256_source
+
+LINE = "The proposed method outperforms the baseline on every benchmark we evaluated. "
+
+
+def make_pdf_bytes(n_pages: int) -> bytes:
+    with fitz.open() as doc:
+        for idx in range(n_pages):
+            page = doc.new_page()
+            page.insert_textbox(fitz.Rect(50, 50, 550, 800), f"Page {idx + 1}\n" + LINE * 40, fontsize=9)
+        return doc.tobytes()
+
+
+def via_temp_file(content: bytes) -> str:
+    # What the upload handlers used to do for every request
+    tmp_folder = tempfile.mkdtemp()
+    pdf_path = os.path.join(tmp_folder, "upload.pdf")
+    try:
+        with open(pdf_path, "wb") as f:
+            f.write(content)
+        sha256_file(pdf_path)
+        return extract_text_from_pdf(pdf_path)
+    finally:
+        shutil.rmtree(tmp_folder, ignore_errors=True)
+
+
+def in_memory(content: bytes) -> str:
+    sha256_source(content)
+    return extract_text_from_pdf(content)
+
+
+def timings(fn, content, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(content)
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return {"p50_ms": samples[len(samples) // 2] * 1000, "min_ms": samples[0] * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[5, 20, 100])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--out", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    rows = []
+    print(f"{'pages':>6} {'size KB':>8} {'temp p50 ms':>12} {'memory p50 ms':>14} {'saved':>7}")
+    for n in args.pages:
+        content = make_pdf_bytes(n)
+        assert via_temp_file(content) == in_memory(content)
+        t_file = timings(via_temp_file, content, args.repeat)
+        t_mem = timings(in_memory, content, args.repeat)
+        saved = 1 - t_mem["p50_ms"] / t_file["p50_ms"]
+        rows.append({"pages": n, "bytes": len(content), "temp_file": t_file, "in_memory": t_mem})
+        print(f"{n:>6} {len(content) / 1024:>8.0f} {t_file['p50_ms']:>12.2f} {t_mem['p50_ms']:>14.2f} {saved:>7.1%}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: offline MinHash-LSH plagiarism index. Builds an index over a
+synthetic corpus, then times full-paper checks (every sentence) and reports
+recall on sentences copied from the corpus. For reference, the Google path
+checks 3 sampled sentences with a 2 s sleep after each (~6 s per paper).
+
+Run from the repo root:
+    python benchmarks/bench_plagiarism.py --docs 2000 --sentences 200
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plagiarism_index import PlagiarismIndex, build_index
+
+
+def random_sentence(rng, vocab):
+    return " ".join(rng.choice(vocab) for _ in range(rng.randint(12, 25)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--sentences-per-doc", type=int, default=40)
+    parser.add_argument("--sentences", type=int, default=200, help="sentences in the checked paper")
+    parser.add_argument("--copied", type=float, default=0.1, help="fraction copied from the corpus")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--out", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocab = [f"w{i}" for i in range(5000)]
+    corpus = [({"source": f"doc{d}"}, ". ".join(random_sentence(rng, vocab) for _ in range(args.sentences_per_doc)) + ".")
+              for d in range(args.docs)]
+
+    n_copied = int(args.sentences * args.copied)
+    copied = [rng.choice(corpus)[1].split(". ")[rng.randrange(args.sentences_per_doc - 1)] for _ in range(n_copied)]
+    paper = ". ".join(copied + [random_sentence(rng, vocab) for _ in range(args.sentences - n_copied)]) + "."
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index_dir = os.path.join(tmp, "index")
+        t0 = time.perf_counter()
+        meta = build_index(corpus, index_dir)
+        build_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        index = PlagiarismIndex(index_dir)
+        open_s = time.perf_counter() - t0
+
+        samples = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            percent, _, risk, sources = index.check(paper)
+            samples.append(time.perf_counter() - t0)
+        samples.sort()
+
+    result = {
+        "corpus_sentences": meta["sentences"], "build_s": build_s, "open_s": open_s,
+        "paper_sentences": args.sentences, "check_p50_ms": samples[len(samples) // 2] * 1000,
+        "check_max_ms": samples[-1] * 1000, "expected_percent": int(100 * n_copied / args.sentences),
+        "detected_percent": percent, "risk": risk, "sources": len(sources),
+    }
+    print(f"index: {meta['sentences']} sentences, built in {build_s:.1f}s, opened in {open_s * 1000:.1f} ms")
+    print(f"check: {args.sentences} sentences in {result['check_p50_ms']:.1f} ms p50 "
+          f"({result['check_max_ms']:.1f} ms max)")
+    print(f"detected {percent}% ({risk}), expected {result['expected_percent']}%")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
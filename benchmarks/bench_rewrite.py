@@ -0,0 +1,58 @@
+"""
+Benchmark: rewrite throughput (sentences/second) of the per-sentence loop
+(batch size 1) against batched JSON rewrites, against a running Ollama.
+The LLM response cache is disabled so every request reaches the model.
+
+Run from the repo root (OLLAMA_URL selects the server):
+    python benchmarks/bench_rewrite.py --sentences 32 --batch-sizes 1 4 8 16
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm_client
+from review_model import rewrite_texts_with_ollama
+
+TEMPLATES = [
+    "we show that our model is way better than the old baselines on {n} datasets",
+    "the results are pretty good and we think they prove the method works for {n} cases",
+    "our approach can be improved a lot in future work by adding {n} more layers",
+    "we did not compare with enough baselines and the dataset has only {n} samples",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, default=32)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--model", default="llama3.1:8b")
+    parser.add_argument("--out", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    llm_client.LLM_CACHE_ENABLED = False
+    rng = random.Random(0)
+    sentences = [rng.choice(TEMPLATES).format(n=i) for i in range(args.sentences)]
+
+    rows = []
+    print(f"{'batch':>6} {'seconds':>9} {'sent/s':>8} {'unchanged':>10}")
+    for size in args.batch_sizes:
+        t0 = time.perf_counter()
+        out = rewrite_texts_with_ollama(sentences, model=args.model, batch_size=size)
+        elapsed = time.perf_counter() - t0
+        unchanged = sum(a == b for a, b in zip(sentences, out))
+        rows.append({"batch_size": size, "seconds": elapsed, "sentences_per_s": len(sentences) / elapsed,
+                     "unchanged": unchanged})
+        print(f"{size:>6} {elapsed:>9.2f} {len(sentences) / elapsed:>8.2f} {unchanged:>10}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"model": args.model, "sentences": len(sentences), "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
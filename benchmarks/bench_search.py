@@ -0,0 +1,71 @@
+"""
+Benchmark: plagiarism web-search dispatch against the local stand-in
+search server. Compares the old loop (one query at a time with a fixed
+sleep after each) with concurrent dispatch behind a token bucket, and
+shows how 429s from the provider are absorbed by backoff.
+
+Run from the repo root:
+    python benchmarks/bench_search.py --latency 0.3 --rate-limit 4 --samples 3 12
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_search_server
+from search_backends import HttpSearchBackend, TokenBucket, search_many
+
+
+def sequential(backend, sentences, sleep):
+    # What check_plagiarism_google used to do
+    out = []
+    for sent in sentences:
+        out.append(backend.search(sent))
+        time.sleep(sleep)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, nargs="+", default=[3, 12])
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--rate-limit", type=float, default=4.0, help="provider limit, requests/second")
+    parser.add_argument("--rate", type=float, default=3.5, help="client token bucket rate")
+    parser.add_argument("--burst", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--sleep", type=float, default=2.0, help="fixed sleep of the old loop")
+    parser.add_argument("--out", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    server, url = fake_search_server.start(latency=args.latency, rate_limit=args.rate_limit, hit_rate=0.3)
+    backend = HttpSearchBackend(url)
+    rows = []
+    print(f"{'samples':>8} {'sequential s':>13} {'concurrent s':>13} {'429s':>5} {'failed':>7}")
+    for n in args.samples:
+        sentences = [f"sampled sentence number {i} of the benchmark paper with enough words" for i in range(n)]
+        t0 = time.perf_counter()
+        expected = sequential(backend, sentences, args.sleep)
+        t_seq = time.perf_counter() - t0
+
+        limited_before = server.stats["rate_limited"]
+        t0 = time.perf_counter()
+        got = search_many(backend, sentences, workers=args.workers, limiter=TokenBucket(args.rate, args.burst))
+        t_conc = time.perf_counter() - t0
+        failed = sum(isinstance(r, Exception) for r in got)
+        assert failed or got == expected
+        rows.append({"samples": n, "sequential_s": t_seq, "concurrent_s": t_conc,
+                     "rate_limited": server.stats["rate_limited"] - limited_before, "failed": failed})
+        print(f"{n:>8} {t_seq:>13.2f} {t_conc:>13.2f} {rows[-1]['rate_limited']:>5} {failed:>7}")
+    server.shutdown()
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
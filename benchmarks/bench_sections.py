@@ -0,0 +1,132 @@
+"""
+Benchmark: worst-case timing of the line-anchored section indexer against
+the original lazy-regex detect_sections on adversarial inputs. Before
+timing, it checks that wrapped body lines ("the experimental results.",
+"appendix A lists ...") never become section boundaries.
+
+Run from the repo root:
+    python benchmarks/bench_sections.py --size 50000
+"""
+import argparse
+import os
+import re
+import sys
+import textwrap
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from review_model import detect_sections, index_sections
+
+
+def legacy_detect_sections(text: str) -> dict:
+    """The pre-indexer implementation, kept here as the baseline."""
+    sections = {"abstract": "", "introduction": "", "methodology": "", "results": "", "conclusion": ""}
+    clean_text = text.lower()
+    patterns = {
+        "abstract": r"abstract(.*?)(introduction|1\.)",
+        "introduction": r"(introduction|1\.)(.*?)(methodology|methods|2\.)",
+        "methodology": r"(methodology|methods|2\.)(.*?)(results|3\.)",
+        "results": r"(results|3\.)(.*?)(conclusion|4\.)",
+        "conclusion": r"(conclusion|4\.)(.*)",
+    }
+    for section, pattern in patterns.items():
+        match = re.search(pattern, clean_text, re.DOTALL)
+        if match:
+            sections[section] = match.group(0).strip()
+    return sections
+
+
+def adversarial_inputs(size: int) -> dict:
+    return {
+        # Every "abstract" starts a lazy scan that never finds a terminator
+        "repeated_abstract": "abstract " * (size // 9),
+        "repeated_methods": "methods " * (size // 8),
+        # One enormous line of words in front of a keyword
+        "single_long_line": ("word " * (size // 5)) + "results",
+        # Thousands of title-cased numbered lines that are all candidate headings
+        "many_headings": "".join(f"{i % 99} Some Title Words Here\n" for i in range(size // 26)),
+        # Numbers everywhere, as in tables and figure captions
+        "numbers_and_figs": "Fig. 1. 0.1. 2. 3. " * (size // 19),
+        "realistic": ("Abstract\nWe study things.\n1. Introduction\n" + "Text line. " * 50 + "\n"
+                      "2. Methodology\n" + "Method line. " * 50 + "\n3. Results\n" + "Result line. " * 50
+                      + "\n4. Conclusion\nDone.\n") * max(1, size // 2200),
+    }
+
+
+def wrapped(paragraph: str, width: int = 90) -> str:
+    # PyMuPDF emits one line per visual line, so prose arrives hard-wrapped
+    return textwrap.fill(paragraph, width)
+
+
+def regression_cases():
+    """(name, text, {section: text its span must start with}, {section: text it must contain})."""
+    # Lines that are nothing but a keyword, as a narrow column produces them
+    abstract = wrapped("We describe a reviewing pipeline and compare it against two baselines, reporting "
+                       "all of the") + "\nexperimental results.\nOur\nmethods.\nConclusion\nfollows from this."
+    intro = wrapped("Prior systems depend on hand-written rules and few of them describe their exact "
+                    "methods. Results reported in earlier work are hard to compare, and the appendix "
+                    "is where most of them hide the details.") + "\n" + wrapped(
+                    "appendix A lists are long; we keep them short here and move on to the evaluation "
+                    "protocol that the remaining sections of this paper describe in detail.")
+    body = ("Abstract\n" + abstract + "\n1 Introduction\n" + intro + "\n2 Methodology\n"
+            + wrapped("We fine-tune a small encoder and describe the training schedule, the data splits "
+                      "and the evaluation protocol used for all results.") + "\n5 Results\n"
+            + wrapped("Accuracy improves by three points over the strongest baseline, and the gains hold "
+                      "across all of the conclusion.") + "\n6 Conclusion\n"
+            + wrapped("The approach works. Appendix B has more.") + "\nReferences\n[1] A. Author. Methods.\n")
+    return [
+        ("wrapped_keywords", body,
+         {"abstract": "Abstract", "introduction": "1 Introduction", "methodology": "2 Methodology",
+          "results": "5 Results", "conclusion": "6 Conclusion"},
+         {"introduction": "appendix A lists are long", "abstract": "experimental results.\nOur\nmethods.\nConclusion\nfollows"}),
+        ("unnumbered_title_case", "ABSTRACT\nWe study things.\n\nIntroduction\nText here.\n\n"
+         "Experimental Results\nNumbers.\n\nConclusions\nDone.\n",
+         {"abstract": "ABSTRACT", "introduction": "Introduction", "results": "Experimental Results",
+          "conclusion": "Conclusions"}, {}),
+        ("sentence_not_heading", "Abstract\nShort.\nOur Main Results.\nMore text.\n",
+         {"abstract": "Abstract"}, {"abstract": "Our Main Results."}),
+    ]
+
+
+def check_regressions():
+    for name, text, starts, contains in regression_cases():
+        sections = detect_sections(text)
+        for section, prefix in starts.items():
+            assert sections[section].startswith(prefix), (name, section, sections[section][:60])
+        for section, fragment in contains.items():
+            assert fragment in sections[section], (name, section, fragment)
+        print(f"✅ {name}")
+
+
+def timed(fn, text):
+    t0 = time.perf_counter()
+    out = fn(text)
+    return time.perf_counter() - t0, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=50000, help="approximate characters per input")
+    parser.add_argument("--skip-legacy", action="store_true", help="only time the new indexer")
+    args = parser.parse_args()
+
+    check_regressions()
+    print(f"\n{'input':<20} {'chars':>8} {'legacy s':>9} {'indexer s':>10} {'legacy copied':>14} {'indexer copied':>15}")
+    for name, text in adversarial_inputs(args.size).items():
+        t_new, spans = timed(index_sections, text)
+        copied_new = sum(len(v) for v in detect_sections(text).values())
+        # Spans must be disjoint
+        ordered = sorted(spans.values())
+        assert all(a[1] <= b[0] for a, b in zip(ordered, ordered[1:])), name
+
+        if args.skip_legacy:
+            t_old, copied_old = float("nan"), 0
+        else:
+            t_old, old = timed(legacy_detect_sections, text)
+            copied_old = sum(len(v) for v in old.values())
+        print(f"{name:<20} {len(text):>8} {t_old:>9.3f} {t_new:>10.4f} {copied_old:>14} {copied_new:>15}")
+
+
+if __name__ == "__main__":
+    main()
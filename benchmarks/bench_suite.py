@@ -0,0 +1,149 @@
+"""
+Benchmark suite: times extract_text_from_pdf, detect_sections,
+preprocess_and_tokenize, classify_sentences and a full review_pdf on
+synthetic papers of several sizes (see synthetic_paper.py). The LLM calls
+(canned_llm) and web plagiarism search are stubbed, so no Ollama or network
+is needed.
+
+Results are JSON, usable as a baseline for later runs. --compare flags
+every benchmark whose p50 got slower than the baseline by more than
+--threshold. The exit status is 1 if anything regressed.
+
+Run from the repo root:
+    python benchmarks/bench_suite.py --out baseline.json
+    python benchmarks/bench_suite.py --compare baseline.json --out current.json
+    python benchmarks/bench_suite.py --compare baseline.json --current current.json   # no run
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fitz  # PyMuPDF
+
+import canned_llm
+import llm_client
+import online_plagiarism
+import review_model
+from review_model import (SECTION_NAMES, classify_sentences, detect_sections, extract_text_from_pdf,
+                          preprocess_and_tokenize, review_pdf)
+from synthetic_paper import make_paper
+
+
+def measure(fn, repeat: int, warmup: int = 1) -> dict:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return {"p50_ms": round(statistics.median(samples), 4), "min_ms": round(samples[0], 4),
+            "mean_ms": round(statistics.fmean(samples), 4), "repeat": repeat}
+
+
+def stub_services():
+    # No Ollama, no web search; the offline plagiarism index still runs if configured
+    llm_client.generate = canned_llm.stub_generate
+    online_plagiarism.search = None
+
+
+def run_suite(pages_list, repeat: int, seed: int) -> dict:
+    stub_services()
+    results = {}
+    for pages in pages_list:
+        content, info = make_paper(pages, seed)
+        text = extract_text_from_pdf(content)
+        sections = detect_sections(text)
+        sentences = [s for name in SECTION_NAMES for s in preprocess_and_tokenize(sections[name])]
+
+        cases = {
+            "extract_text_from_pdf": lambda: extract_text_from_pdf(content),
+            "detect_sections": lambda: detect_sections(text),
+            "preprocess_and_tokenize": lambda: [preprocess_and_tokenize(sections[n]) for n in SECTION_NAMES],
+            "classify_sentences": lambda: classify_sentences(sentences),
+            "review_pdf": lambda: review_pdf(content, rewrite=True),
+        }
+        for name, fn in cases.items():
+            key = f"{name}[{pages}p]"
+            results[key] = dict(measure(fn, repeat), pages=info["pages"], bytes=len(content),
+                                sentences=len(sentences))
+            print(f"{key:<34} p50 {results[key]['p50_ms']:>10.3f} ms   min {results[key]['min_ms']:>10.3f} ms")
+    return results
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(), "platform": platform.platform(), "machine": platform.machine(),
+        "cpus": os.cpu_count(), "pymupdf": getattr(fitz, "VersionBind", "?"),
+        "pipeline_version": review_model.PIPELINE_VERSION, "spacy_pipeline": review_model.SPACY_PIPELINE_MODE,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float, min_delta_ms: float) -> bool:
+    """Prints a per-benchmark comparison; returns True if anything regressed."""
+    base, cur = baseline["results"], current["results"]
+    for field in ("python", "machine", "cpus", "pymupdf"):
+        if baseline.get("env", {}).get(field) != current.get("env", {}).get(field):
+            print(f"⚠️  {field} differs from the baseline "
+                  f"({baseline.get('env', {}).get(field)} vs {current.get('env', {}).get(field)})")
+
+    regressed = False
+    print(f"\n{'benchmark':<34} {'base ms':>10} {'now ms':>10} {'change':>8}  status")
+    for key in sorted(set(base) | set(cur)):
+        if key not in base or key not in cur:
+            print(f"{key:<34} {'':>10} {'':>10} {'':>8}  {'new' if key in cur else 'missing'}")
+            continue
+        b, c = base[key]["p50_ms"], cur[key]["p50_ms"]
+        change = c / b - 1 if b else 0.0
+        # Tiny absolute differences are timer noise, however large the ratio
+        if change > threshold and c - b > min_delta_ms:
+            status, regressed = "❌ REGRESSION", True
+        elif change < -threshold and b - c > min_delta_ms:
+            status = "✅ faster"
+        else:
+            status = "ok"
+        print(f"{key:<34} {b:>10.3f} {c:>10.3f} {change:>+8.1%}  {status}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[2, 10, 40])
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write results to this JSON file (use it as a baseline later)")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against this baseline JSON")
+    parser.add_argument("--current", help="with --compare: compare this results file instead of running")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed p50 slowdown (default 0.15 = 15%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    if args.current:
+        with open(args.current) as f:
+            current = json.load(f)
+    else:
+        current = {"env": environment(), "pages": args.pages, "seed": args.seed,
+                   "results": run_suite(args.pages, args.repeat, args.seed)}
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump(current, f, indent=2)
+            print(f"\n💾 Results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, current, args.threshold, args.min_delta_ms):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: per-paper sentence splitting, full spaCy pipeline with one nlp()
+call per section (before) vs. the sentence-only pipeline with a single
+batched nlp.pipe call (after).
+
+Run from the repo root:
+    python benchmarks/bench_tokenize.py paper1.pdf paper2.pdf --out tokenize.json
+Without PDFs a synthetic paper text is used.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import review_model
+from review_model import detect_sections, extract_text_from_pdf, load_nlp, preprocess_sections
+
+SECTION_ORDER = ["abstract", "introduction", "methodology", "results", "conclusion"]
+
+
+def synthetic_paper(paragraphs_per_section: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = ("model data results method baseline accuracy training evaluation "
+             "proposed approach significant robust dataset performance").split()
+    parts = []
+    for heading in ["Abstract", "1. Introduction", "2. Methodology", "3. Results", "4. Conclusion"]:
+        parts.append(heading)
+        for _ in range(paragraphs_per_section):
+            sents = [" ".join(rng.choice(words) for _ in range(rng.randint(8, 25))).capitalize() + "."
+                     for _ in range(6)]
+            parts.append(" ".join(sents))
+    return "\n\n".join(parts)
+
+
+def before(nlp, sections):
+    """The original path: one nlp() call per section, all components on."""
+    out = {}
+    for name in SECTION_ORDER:
+        text = sections.get(name, "")
+        out[name] = [s.text.strip() for s in nlp(text).sents if len(s.text.strip()) > 15] if text else []
+    return out
+
+
+def after(nlp, sections):
+    review_model.nlp = nlp
+    return preprocess_sections({name: sections.get(name, "") for name in SECTION_ORDER})
+
+
+def time_it(fn, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdfs", nargs="*")
+    parser.add_argument("--paragraphs", type=int, default=40, help="synthetic paragraphs per section")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", help="write per-paper timings to this JSON file")
+    args = parser.parse_args()
+
+    papers = [(p, extract_text_from_pdf(p)) for p in args.pdfs] or [("synthetic", synthetic_paper(args.paragraphs))]
+
+    t0 = time.perf_counter()
+    full_nlp = load_nlp("full")
+    full_load = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    slim_nlp = load_nlp("sentences")
+    slim_load = time.perf_counter() - t0
+    print(f"load: full {full_load:.2f}s ({', '.join(full_nlp.pipe_names)})")
+    print(f"load: slim {slim_load:.2f}s ({', '.join(slim_nlp.pipe_names)})")
+
+    records = []
+    print(f"{'paper':<30} {'chars':>8} {'before s':>9} {'after s':>9} {'speedup':>8}")
+    for name, text in papers:
+        sections = detect_sections(text)
+        t_before = time_it(before, full_nlp, sections, repeat=args.repeat)
+        t_after = time_it(after, slim_nlp, sections, repeat=args.repeat)
+        records.append({"paper": name, "chars": len(text), "before_s": t_before, "after_s": t_after})
+        print(f"{os.path.basename(name)[:30]:<30} {len(text):>8} {t_before:>9.3f} {t_after:>9.3f} {t_before / t_after:>7.2f}x")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"full_load_s": full_load, "slim_load_s": slim_load, "papers": records}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Canned, schema-valid Ollama answers for the reviewer's prompts: section
+review, scorecard, batched and single rewrites. bench_suite.py patches
+llm_client.generate with stub_generate. Anything that needs a real HTTP
+endpoint can serve canned_response instead.
+"""
+import json
+import re
+import time
+
+SECTION_REVIEW = {
+    "summary": "The authors propose a pipeline and evaluate it on public benchmarks.",
+    "weaknesses": ["Baselines are not tuned with the same budget.", "No variance is reported across seeds."],
+    "score": 6,
+}
+SCORECARD = {
+    "originality": 7, "methodology": 6, "clarity": 8, "significance": 6,
+    "recommendation": "Weak Accept", "reason": "A sound idea whose evaluation is narrower than its claims.",
+}
+
+_BATCH_INPUT = re.compile(r"Input \(JSON\): ")
+_SINGLE_INPUT = re.compile(r'Input: "(.*)"', re.DOTALL)
+
+
+def _rewrite(text: str) -> str:
+    # Deterministic and close to the input length, so the batch length guard accepts it
+    text = re.sub(r"\b[Ww]e\b", "the authors", text)
+    text = re.sub(r"\b[Oo]ur\b", "the", text)
+    return text[:1].upper() + text[1:]
+
+
+def prompt_kind(payload: dict) -> str:
+    """section_review, scorecard, rewrite_batch, rewrite or other."""
+    prompt = payload.get("prompt", "")
+    if _BATCH_INPUT.search(prompt):
+        return "rewrite_batch"
+    if "final review scorecard" in prompt:
+        return "scorecard"
+    if "Analyze the following '" in prompt:
+        return "section_review"
+    if "strict academic editor" in prompt:
+        return "rewrite"
+    return "other"
+
+
+def canned_response(payload: dict) -> str:
+    """The "response" text Ollama would produce for this request."""
+    kind = prompt_kind(payload)
+    prompt = payload.get("prompt", "")
+    if kind == "section_review":
+        return json.dumps(SECTION_REVIEW)
+    if kind == "scorecard":
+        return json.dumps(SCORECARD)
+    if kind == "rewrite_batch":
+        start = _BATCH_INPUT.search(prompt).end()
+        items, _ = json.JSONDecoder().raw_decode(prompt[start:])
+        return json.dumps({"rewrites": [{"id": it["id"], "text": _rewrite(it["text"])} for it in items]})
+    if kind == "rewrite":
+        m = _SINGLE_INPUT.search(prompt)
+        return _rewrite(m.group(1)) if m else ""
+    return json.dumps({"response": "ok"}) if payload.get("format") == "json" else "ok"
+
+
+def response_body(payload: dict, text: str, seconds: float = 0.0) -> dict:
+    """A final /api/generate body with Ollama's timing counters (durations in ns)."""
+    eval_count = max(1, len(text) // 4)
+    return {
+        "model": payload.get("model", ""), "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "response": text, "done": True, "done_reason": "stop",
+        "prompt_eval_count": max(1, len(payload.get("prompt", "")) // 4),
+        "eval_count": eval_count, "eval_duration": int(max(seconds, 1e-6) * 1e9),
+        "total_duration": int(max(seconds, 1e-6) * 1e9),
+    }
+
+
+def stub_generate(payload: dict, call_site: str = "default", timeout=None, use_cache: bool = True,
+                  on_token=None, validate=None) -> dict:
+    """Drop-in for llm_client.generate with no network or cache."""
+    started = time.perf_counter()
+    text = canned_response(payload)
+    if on_token is not None and text:
+        on_token(text)
+    return response_body(payload, text, time.perf_counter() - started)
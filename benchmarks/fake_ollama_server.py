@@ -0,0 +1,243 @@
+"""
+Local stand-in for Ollama, for reproducible performance work on the review
+pipeline without a GPU or a model. Implements what llm_client speaks:
+
+    POST /api/generate   streaming (NDJSON, the Ollama default) or "stream": false,
+                         with "format": "json" honoured
+    GET  /api/tags, /api/version, /
+    GET  /stats          request / error / queue / concurrency counters
+
+Answers are canned_llm's schema-valid outputs for the section review,
+scorecard and (batched) rewrite prompts. Every request pays --ttft seconds
+before its first token, then --token-latency seconds per token. Randomness
+comes from a --seed'ed generator, so a given request order always sees the
+same outcomes. Failures can be injected:
+- --error-rate: the share of requests answered with HTTP 500.
+- --stream-error-rate: the share of streamed requests that break off with
+  an {"error"} line after the first token.
+- --max-concurrency: requests generate at once; the rest queue, like
+  OLLAMA_NUM_PARALLEL.
+- --max-queue: queue size before a 503, like OLLAMA_MAX_QUEUE.
+
+Run standalone:
+    python benchmarks/fake_ollama_server.py --port 11434 --ttft 0.2 --token-latency 0.02 --max-concurrency 2
+    OLLAMA_URL=http://localhost:11434 uvicorn server:app
+or in-process: server, url = start(ttft=0.2, token_latency=0.02); llm_client.OLLAMA_URL = url
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import canned_llm
+
+_TOKEN_RE = re.compile(r"\s*\S+|\s+")
+
+
+def tokenize(text: str):
+    """Word-sized pieces that concatenate back to `text`."""
+    return _TOKEN_RE.findall(text) or [""]
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, ttft: float = 0.0, token_latency: float = 0.0, error_rate: float = 0.0,
+                 stream_error_rate: float = 0.0, max_concurrency: int = 0, max_queue: int = 512,
+                 model: str = "llama3.1:8b", seed: int = 0):
+        super().__init__(address, _Handler)
+        self.ttft = ttft
+        self.token_latency = token_latency
+        self.error_rate = error_rate
+        self.stream_error_rate = stream_error_rate
+        self.max_queue = max_queue
+        self.model = model
+        self.rng = random.Random(seed)
+        self.slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency > 0 else None
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "streamed": 0, "errors": 0, "stream_errors": 0, "rejected": 0,
+                      "queued": 0, "max_queued": 0, "in_flight": 0, "max_in_flight": 0, "by_kind": {}}
+
+    def roll(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self.lock:
+            return self.rng.random() < rate
+
+    def acquire(self) -> bool:
+        """Waits for a generation slot; False when the queue is full (503)."""
+        if self.slots is None:
+            return True
+        if self.slots.acquire(blocking=False):
+            return True
+        with self.lock:
+            if self.stats["queued"] >= self.max_queue:
+                self.stats["rejected"] += 1
+                return False
+            self.stats["queued"] += 1
+            self.stats["max_queued"] = max(self.stats["max_queued"], self.stats["queued"])
+        self.slots.acquire()
+        with self.lock:
+            self.stats["queued"] -= 1
+        return True
+
+    def release(self):
+        if self.slots is not None:
+            self.slots.release()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like Ollama, so client connection pooling is exercised
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status: int, body: dict):
+        raw = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _chunk(self, body: dict):
+        raw = (json.dumps(body) + "\n").encode()
+        self.wfile.write(f"{len(raw):x}\r\n".encode() + raw + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        srv = self.server
+        if self.path == "/stats":
+            with srv.lock:
+                return self._json(200, json.loads(json.dumps(srv.stats)))
+        if self.path == "/api/tags":
+            return self._json(200, {"models": [{"name": srv.model, "model": srv.model, "size": 0}]})
+        if self.path == "/api/version":
+            return self._json(200, {"version": "0.0.0-fake"})
+        if self.path == "/":
+            raw = b"Ollama is running"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            return self.wfile.write(raw)
+        self._json(404, {"error": "not found"})
+
+    def do_POST(self):
+        srv = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._json(400, {"error": "invalid JSON body"})
+        if self.path != "/api/generate":
+            return self._json(404, {"error": "not found"})
+
+        stream = payload.get("stream", True)
+        kind = canned_llm.prompt_kind(payload)
+        with srv.lock:
+            srv.stats["requests"] += 1
+            srv.stats["streamed"] += bool(stream)
+            srv.stats["by_kind"][kind] = srv.stats["by_kind"].get(kind, 0) + 1
+
+        if srv.roll(srv.error_rate):
+            with srv.lock:
+                srv.stats["errors"] += 1
+            return self._json(500, {"error": "injected failure"})
+        if not srv.acquire():
+            return self._json(503, {"error": "server busy, please try again. maximum pending requests exceeded"})
+
+        with srv.lock:
+            srv.stats["in_flight"] += 1
+            srv.stats["max_in_flight"] = max(srv.stats["max_in_flight"], srv.stats["in_flight"])
+        try:
+            started = time.perf_counter()
+            tokens = tokenize(canned_llm.canned_response(payload))
+            if srv.ttft:
+                time.sleep(srv.ttft)
+            if stream:
+                self._stream(payload, tokens, started)
+            else:
+                if srv.token_latency:
+                    time.sleep(srv.token_latency * len(tokens))
+                self._json(200, self._final(payload, "".join(tokens), len(tokens), started))
+        finally:
+            with srv.lock:
+                srv.stats["in_flight"] -= 1
+            srv.release()
+
+    def _final(self, payload: dict, text: str, eval_count: int, started: float) -> dict:
+        srv = self.server
+        body = canned_llm.response_body(dict(payload, model=payload.get("model", srv.model)), text,
+                                        time.perf_counter() - started)
+        # Report what the latency model charged, so tokens/s is what was configured
+        body["eval_count"] = eval_count
+        body["eval_duration"] = int(max(srv.token_latency * eval_count, 1e-6) * 1e9)
+        body["prompt_eval_duration"] = int(srv.ttft * 1e9)
+        return body
+
+    def _stream(self, payload: dict, tokens, started: float):
+        srv = self.server
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        fail = srv.roll(srv.stream_error_rate)
+        created = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        for idx, piece in enumerate(tokens):
+            if idx and srv.token_latency:
+                time.sleep(srv.token_latency)
+            self._chunk({"model": payload.get("model", srv.model), "created_at": created,
+                         "response": piece, "done": False})
+            if fail:
+                with srv.lock:
+                    srv.stats["stream_errors"] += 1
+                self._chunk({"error": "injected failure mid-stream"})
+                break
+        else:
+            self._chunk(dict(self._final(payload, "", len(tokens), started), response=""))
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def start(host: str = "127.0.0.1", port: int = 0, **options):
+    """Starts the server on a daemon thread; returns (server, base_url)."""
+    server = FakeOllamaServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--ttft", type=float, default=0.0, help="seconds before the first token")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds per generated token")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 500")
+    parser.add_argument("--stream-error-rate", type=float, default=0.0,
+                        help="share of streamed requests that fail after the first token")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="generations at once (0 = unlimited)")
+    parser.add_argument("--max-queue", type=int, default=512, help="queued requests before 503")
+    parser.add_argument("--model", default="llama3.1:8b")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = FakeOllamaServer((args.host, args.port), ttft=args.ttft, token_latency=args.token_latency,
+                              error_rate=args.error_rate, stream_error_rate=args.stream_error_rate,
+                              max_concurrency=args.max_concurrency, max_queue=args.max_queue,
+                              model=args.model, seed=args.seed)
+    print(f"🦙 Fake Ollama on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
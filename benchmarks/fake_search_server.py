@@ -0,0 +1,149 @@
+"""
+Local stand-in for a web search API, for exercising the plagiarism search
+path without hitting a real provider. Implements the protocol
+search_backends.HttpSearchBackend speaks:
+
+    GET /search?q="sentence"  ->  {"results": [{"url": ...}]}
+    GET /stats                ->  request / 429 / concurrency counters
+
+A query is a hit if its phrase occurs in --corpus (a text or JSONL file),
+or else with probability --hit-rate (deterministic per query). Latency and
+a provider-side rate limit (429 + Retry-After) can be injected.
+
+Run standalone:
+    python benchmarks/fake_search_server.py --port 8765 --latency 0.3 --rate-limit 5
+    REVIEWER_SEARCH_BACKEND=http REVIEWER_SEARCH_URL=http://localhost:8765 uvicorn server:app
+or in-process: server, url = start(latency=0.3, rate_limit=5)
+"""
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+class FakeSearchServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, corpus_text: str = "", hit_rate: float = 0.0,
+                 latency: float = 0.0, rate_limit: float = 0.0, retry_after: float = 1.0):
+        super().__init__(address, _Handler)
+        self.corpus = _normalize(corpus_text)
+        self.hit_rate = hit_rate
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.recent = []  # request timestamps in the last second
+        self.stats = {"requests": 0, "hits": 0, "rate_limited": 0, "in_flight": 0, "max_in_flight": 0}
+
+    def over_limit(self) -> bool:
+        if not self.rate_limit:
+            return False
+        now = time.monotonic()
+        with self.lock:
+            self.recent = [t for t in self.recent if now - t < 1.0]
+            if len(self.recent) >= self.rate_limit:
+                self.stats["rate_limited"] += 1
+                return True
+            self.recent.append(now)
+            return False
+
+    def is_hit(self, query: str) -> bool:
+        phrase = _normalize(query)
+        if self.corpus and phrase and phrase in self.corpus:
+            return True
+        bucket = int(hashlib.sha256(phrase.encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+        return bucket < self.hit_rate
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status: int, body: dict, headers=None):
+        raw = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_GET(self):
+        srv = self.server
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            with srv.lock:
+                return self._json(200, dict(srv.stats))
+        if url.path != "/search":
+            return self._json(404, {"error": "not found"})
+
+        with srv.lock:
+            srv.stats["requests"] += 1
+        if srv.over_limit():
+            return self._json(429, {"error": "rate limited"}, {"Retry-After": str(srv.retry_after)})
+
+        with srv.lock:
+            srv.stats["in_flight"] += 1
+            srv.stats["max_in_flight"] = max(srv.stats["max_in_flight"], srv.stats["in_flight"])
+        try:
+            if srv.latency:
+                time.sleep(srv.latency)
+            query = parse_qs(url.query).get("q", [""])[0]
+            hit = srv.is_hit(query)
+            with srv.lock:
+                srv.stats["hits"] += hit
+            digest = hashlib.sha1(query.encode()).hexdigest()[:12]
+            results = [{"url": f"https://example.org/doc/{digest}", "title": "Matching document"}] if hit else []
+            self._json(200, {"results": results})
+        finally:
+            with srv.lock:
+                srv.stats["in_flight"] -= 1
+
+
+def load_corpus(path: str) -> str:
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return "\n".join(json.loads(line).get("text", "") for line in f if line.strip())
+        return f.read()
+
+
+def start(host: str = "127.0.0.1", port: int = 0, **options):
+    """Starts the server on a daemon thread; returns (server, base_url)."""
+    server = FakeSearchServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--corpus", help="text or JSONL file whose phrases count as hits")
+    parser.add_argument("--hit-rate", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per search")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="requests/second before 429 (0 = off)")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    args = parser.parse_args()
+
+    server = FakeSearchServer((args.host, args.port), corpus_text=load_corpus(args.corpus) if args.corpus else "",
+                              hit_rate=args.hit_rate, latency=args.latency, rate_limit=args.rate_limit,
+                              retry_after=args.retry_after)
+    print(f"🔎 Fake search server on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Load test for the /analyze endpoints. Replays a corpus of PDFs against
+server.py or api.py and reports, per load level: throughput, p50/p95/p99
+latency and error rate. The levels together give a latency-vs-concurrency
+(or vs-arrival-rate) curve.
+
+Two load models:
+  --concurrency 1 2 4 8   closed loop: N clients, each sending its next
+                          request as soon as the previous one returns
+  --rates 0.5 1 2         open loop: Poisson arrivals at R requests/second.
+                          Latency is counted from the scheduled arrival, so
+                          client-side queueing is not hidden.
+
+By default everything runs locally. The app is served by uvicorn in this
+process. Ollama is replaced by fake_ollama_server, which also runs here,
+and web plagiarism search is a local stub that finds nothing (a missing
+search library would mark every review degraded and uncacheable). The LLM
+response cache is off and the caches live in a temp dir, so every request
+reaches the (fake) LLM and nothing is written to the real .review_cache.
+--url targets an already running server instead; stub its LLM with
+OLLAMA_URL pointing at a standalone fake_ollama_server.
+
+Run from the repo root:
+    python benchmarks/load_test.py --app server:app --concurrency 1 2 4 8 --requests 24
+    python benchmarks/load_test.py --app api:app --rates 0.5 1 2 --duration 30 --corpus papers/
+"""
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+
+
+def load_corpus(paths, synthetic: int, pages: int):
+    """(name, bytes) pairs from PDF files/directories, or synthetic papers."""
+    # Imported here: synthetic_paper pulls in review_model, which fixes the cache dir on import
+    from synthetic_paper import make_paper
+
+    corpus = []
+    for path in paths or []:
+        files = ([os.path.join(d, f) for d, _, names in os.walk(path) for f in names if f.lower().endswith(".pdf")]
+                 if os.path.isdir(path) else [path])
+        for name in sorted(files):
+            with open(name, "rb") as f:
+                corpus.append((os.path.basename(name), f.read()))
+    if not corpus:
+        corpus = [(f"synthetic_{i}.pdf", make_paper(pages, seed=i)[0]) for i in range(synthetic)]
+    return corpus
+
+
+def percentile(values, q):
+    # Nearest rank
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+class Target:
+    def __init__(self, base_url: str, endpoint: str, form: dict, timeout: float):
+        self.url = base_url.rstrip("/") + endpoint
+        self.form = form
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def session(self) -> requests.Session:
+        # One keep-alive session per client thread
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def send(self, paper) -> dict:
+        name, content = paper
+        t0 = time.perf_counter()
+        try:
+            r = self.session().post(self.url, files={"file": (name, content, "application/pdf")},
+                                    data=self.form, timeout=self.timeout)
+            ok = r.status_code == 200
+            error = None if ok else f"HTTP {r.status_code}"
+            if ok and "json" in r.headers.get("content-type", ""):
+                body = r.json()
+                # The handlers report pipeline failures as 200 {"error": ...}
+                if isinstance(body, dict) and body.get("error"):
+                    ok, error = False, "error body"
+            status = r.status_code
+        except requests.RequestException as e:
+            ok, status, error = False, None, type(e).__name__
+        return {"start": t0, "end": time.perf_counter(), "ok": ok, "status": status, "error": error}
+
+
+def closed_loop(target: Target, corpus, clients: int, n_requests: int, duration: float):
+    """`clients` threads send back to back until n_requests are done or `duration` passes."""
+    lock = threading.Lock()
+    issued = [0]
+    deadline = time.perf_counter() + duration if duration else None
+
+    def client():
+        out = []
+        while True:
+            with lock:
+                if (n_requests and issued[0] >= n_requests) or (deadline and time.perf_counter() >= deadline):
+                    return out
+                idx = issued[0]
+                issued[0] += 1
+            res = target.send(corpus[idx % len(corpus)])
+            res["latency"] = res["end"] - res["start"]
+            out.append(res)
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        futures = [pool.submit(client) for _ in range(clients)]
+        return [res for fut in futures for res in fut.result()]
+
+
+def open_loop(target: Target, corpus, rate: float, n_requests: int, duration: float, seed: int,
+              max_in_flight: int):
+    """Poisson arrivals at `rate`/s; latency is measured from each scheduled arrival."""
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    arrivals, t = [], 0.0
+    while (not n_requests or len(arrivals) < n_requests) and (not duration or t < duration):
+        arrivals.append(t)
+        t += rng.expovariate(rate)
+
+    def one(idx, scheduled):
+        res = target.send(corpus[idx % len(corpus)])
+        res["latency"] = res["end"] - scheduled
+        return res
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        futures = []
+        for idx, offset in enumerate(arrivals):
+            delay = started + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(one, idx, started + offset))
+        return [fut.result() for fut in futures]
+
+
+def summarize(results, level_name: str, level) -> dict:
+    latencies = [r["latency"] for r in results if r["ok"]]
+    wall = (max(r["end"] for r in results) - min(r["start"] for r in results)) if results else 0.0
+    errors = {}
+    for r in results:
+        if not r["ok"]:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+    ms = lambda v: round(v * 1000, 1) if v is not None else None
+    return {
+        level_name: level, "requests": len(results), "ok": len(latencies),
+        "error_rate": round(1 - len(latencies) / len(results), 4) if results else 0.0, "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 3) if wall else 0.0,
+        "p50_ms": ms(percentile(latencies, 0.50)), "p95_ms": ms(percentile(latencies, 0.95)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+        "mean_ms": ms(statistics.fmean(latencies)) if latencies else None,
+        "max_ms": ms(max(latencies)) if latencies else None,
+    }
+
+
+def print_curve(rows, level_name: str):
+    print(f"\n{level_name:>12} {'rps':>8} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'errors':>7}  p95")
+    worst = max((r["p95_ms"] or 0) for r in rows) or 1
+    for r in rows:
+        bar = "█" * int(40 * (r["p95_ms"] or 0) / worst)
+        print(f"{r[level_name]:>12} {r['throughput_rps']:>8.2f} {r['p50_ms'] or 0:>10.1f} {r['p95_ms'] or 0:>10.1f} "
+              f"{r['p99_ms'] or 0:>10.1f} {r['error_rate']:>7.1%}  {bar}")
+
+
+def start_local(app_ref: str, ollama_options: dict):
+    """Fake Ollama + the app under uvicorn, both in this process; returns (base_url, stop)."""
+    import fake_ollama_server
+    from bench_concurrency import free_port, isolate_caches, start_app
+
+    # Before the app (and review_cache) is imported
+    isolate_caches()
+    ollama, ollama_url = fake_ollama_server.start(**ollama_options)
+    import llm_client
+    import online_plagiarism
+    import search_backends
+    llm_client.OLLAMA_URL = ollama_url
+    online_plagiarism.search = lambda query, **kwargs: []
+    search_backends._limiter.rate = 1e6
+
+    port = free_port()
+    server = start_app(app_ref, port)
+
+    def stop():
+        server.should_exit = True
+        ollama.shutdown()
+        print(f"🦙 fake Ollama: {json.dumps(ollama.stats)}")
+
+    return f"http://127.0.0.1:{port}", stop
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default="server:app", help="module:attr served locally (ignored with --url)")
+    parser.add_argument("--url", help="base URL of an already running server")
+    parser.add_argument("--endpoint", default="/analyze")
+    parser.add_argument("--corpus", nargs="*", help="PDF files or directories (default: synthetic papers)")
+    parser.add_argument("--synthetic", type=int, default=8, help="synthetic papers when no --corpus")
+    parser.add_argument("--pages", type=int, default=6, help="pages per synthetic paper")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, nargs="+", help="closed-loop client counts (default 1 2 4 8)")
+    load.add_argument("--rates", type=float, nargs="+", help="open-loop arrival rates, requests/second")
+    parser.add_argument("--requests", type=int, default=24, help="requests per level (0 = use --duration)")
+    parser.add_argument("--duration", type=float, default=0.0, help="seconds per level")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="open loop: client threads")
+    parser.add_argument("--cache", action="store_true", help="let repeated papers hit the review cache")
+    parser.add_argument("--no-rewrite", action="store_true")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ttft", type=float, default=0.2, help="fake Ollama: seconds to first token")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="fake Ollama: seconds per token")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="fake Ollama: parallel generations")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--out", help="write the curve and environment to this JSON file")
+    args = parser.parse_args()
+    if not args.requests and not args.duration:
+        parser.error("set --requests or --duration")
+
+    if args.url:
+        base, stop = args.url, (lambda: None)
+    else:
+        base, stop = start_local(args.app, {"ttft": args.ttft, "token_latency": args.token_latency,
+                                            "max_concurrency": args.llm_concurrency,
+                                            "error_rate": args.llm_error_rate, "seed": args.seed})
+    corpus = load_corpus(args.corpus, args.synthetic, args.pages)
+    form = {"rewrite": "false" if args.no_rewrite else "true", "no_cache": "false" if args.cache else "true"}
+    target = Target(base, args.endpoint, form, args.timeout)
+    print(f"🎯 {base}{args.endpoint}  corpus: {len(corpus)} PDFs")
+
+    # One request first, so model loading and pool start-up stay out of the numbers
+    target.send(corpus[0])
+
+    rows = []
+    try:
+        if args.rates:
+            level_name = "rate_rps"
+            for rate in args.rates:
+                results = open_loop(target, corpus, rate, args.requests, args.duration, args.seed,
+                                    args.max_in_flight)
+                rows.append(summarize(results, level_name, rate))
+                print(f"  rate {rate}/s: {json.dumps(rows[-1])}")
+        else:
+            level_name = "concurrency"
+            for clients in args.concurrency or [1, 2, 4, 8]:
+                results = closed_loop(target, corpus, clients, args.requests, args.duration)
+                rows.append(summarize(results, level_name, clients))
+                print(f"  concurrency {clients}: {json.dumps(rows[-1])}")
+    finally:
+        stop()
+
+    print_curve(rows, level_name)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"target": base + args.endpoint, "app": None if args.url else args.app,
+                       "corpus": len(corpus), "form": form,
+                       "fake_ollama": None if args.url else {"ttft": args.ttft, "token_latency": args.token_latency,
+                                                             "llm_concurrency": args.llm_concurrency},
+                       "levels": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Bulk reviewer: reviews every PDF under a directory and appends one JSONL
+record per paper. Re-running with the same output file skips papers whose
+content (SHA-256) already has a successful record, so an interrupted run
+picks up where it stopped. Degraded reviews (an LLM stage or the plagiarism
+check fell back, see review_model.degraded_stages) are recorded with status
+"degraded" and reviewed again on the next run.
+
+    python bulk_review.py papers/ --out reviews.jsonl --workers 4
+"""
+import argparse
+import fnmatch
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+from batch_review import BATCH_NLP_CHUNK, BATCH_NLP_PROCESSES, BATCH_WORKERS, review_batch
+from review_cache import sha256_file
+from review_model import is_cacheable
+
+
+def find_pdfs(root: str, pattern: str = "*.pdf"):
+    """Sorted paths of files under `root` matching `pattern` (case-insensitive)."""
+    found = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if fnmatch.fnmatch(name.lower(), pattern.lower()):
+                found.append(os.path.join(dirpath, name))
+    return sorted(found)
+
+
+def completed_hashes(out_path: str) -> set:
+    """Content hashes that already have a "done" record in the JSONL output."""
+    done = set()
+    if not os.path.exists(out_path):
+        return done
+    with open(out_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a half-written last line from an interrupted run
+            if record.get("status") == "done" and record.get("sha256"):
+                done.add(record["sha256"])
+    return done
+
+
+def _terminate_last_line(out_path: str):
+    """Ends a half-written last line, so the next record does not get glued onto it."""
+    if not os.path.exists(out_path) or os.path.getsize(out_path) == 0:
+        return
+    with open(out_path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+
+
+def summarize(counts: dict, stage_times: dict, wall: float) -> dict:
+    processed = counts["done"] + counts["degraded"] + counts["failed"]
+    return {
+        **counts,
+        "wall_seconds": round(wall, 2),
+        "papers_per_minute": round(60 * processed / wall, 2) if wall > 0 else None,
+        "stages": {
+            stage: {"count": len(v), "total": round(sum(v), 3), "mean": round(sum(v) / len(v), 4),
+                    "p50": round(_percentile(v, 0.5), 4), "p95": round(_percentile(v, 0.95), 4)}
+            for stage, v in stage_times.items()
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory")
+    parser.add_argument("--out", default="reviews.jsonl", help="JSONL file to append to (default: reviews.jsonl)")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="papers in their LLM phase at once")
+    parser.add_argument("--nlp-chunk", type=int, default=BATCH_NLP_CHUNK, help="papers per nlp.pipe call")
+    parser.add_argument("--nlp-processes", type=int, default=BATCH_NLP_PROCESSES)
+    parser.add_argument("--model", default="llama3.1:8b")
+    parser.add_argument("--no-rewrite", action="store_true")
+    parser.add_argument("--no-cache", action="store_true", help="ignore the review cache (results still refresh it)")
+    parser.add_argument("--pattern", default="*.pdf")
+    parser.add_argument("--limit", type=int, help="review at most this many new papers")
+    args = parser.parse_args(argv)
+
+    paths = find_pdfs(args.directory, args.pattern)
+    done = completed_hashes(args.out)
+    counts = {"found": len(paths), "skipped": 0, "duplicates": 0, "done": 0, "degraded": 0, "failed": 0,
+              "cached": 0}
+
+    # Hash up front: resume check plus de-duplication within this run
+    todo, seen = [], set()
+    for path in paths:
+        sha = sha256_file(path)
+        if sha in done:
+            counts["skipped"] += 1
+        elif sha in seen:
+            counts["duplicates"] += 1
+        else:
+            seen.add(sha)
+            todo.append((path, sha))
+    if args.limit is not None:
+        todo = todo[:args.limit]
+
+    print(f"📂 {len(paths)} PDFs found, {counts['skipped']} already reviewed, "
+          f"{counts['duplicates']} duplicates, {len(todo)} to review")
+
+    started = time.time()
+    stage_times = defaultdict(list)
+    papers = [(os.path.relpath(path, args.directory), path) for path, _ in todo]
+    _terminate_last_line(args.out)
+    with open(args.out, "a", encoding="utf-8") as out:
+        records = review_batch(papers, rewrite=not args.no_rewrite, ollama_model=args.model,
+                               use_cache=not args.no_cache, workers=args.workers,
+                               nlp_chunk=args.nlp_chunk, n_process=args.nlp_processes)
+        try:
+            for record in records:
+                path, sha = todo[record.pop("index")]
+                if record["status"] == "done" and not is_cacheable(record["result"]):
+                    # Not counted as completed, so the next run redoes it
+                    record["status"] = "degraded"
+                record = {"path": path, "sha256": sha, "reviewed_at": time.time(), **record}
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+
+                counts[record["status"]] += 1
+                timings = record.get("timings") or {}
+                counts["cached"] += "cache" in timings
+                for stage, sec in timings.items():
+                    stage_times[stage].append(sec)
+                mark = {"done": "✅", "degraded": "⚠️ "}.get(record["status"], "❌")
+                if record["status"] == "degraded":
+                    detail = ": degraded (" + ", ".join(record["result"]["meta"]["degraded"]) + ")"
+                else:
+                    detail = "" if record["status"] == "done" else ": " + record["error"]
+                processed = counts["done"] + counts["degraded"] + counts["failed"]
+                print(f"{mark} [{processed}/{len(todo)}] {record['filename']} ({sum(timings.values()):.1f}s){detail}")
+        except KeyboardInterrupt:
+            print("\n⏸  Interrupted; finished papers are saved, re-run to resume.")
+
+    summary = summarize(counts, stage_times, time.time() - started)
+    print("\n📊 Summary")
+    print(json.dumps(summary, indent=2))
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
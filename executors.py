@@ -0,0 +1,78 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# -----------------------
+# Pool settings
+# -----------------------
+# CPU pool: PyMuPDF extraction, section indexing, spaCy and lexicon matching.
+# IO pool: everything that mostly waits on Ollama or web search.
+CPU_WORKERS = int(os.environ.get("REVIEWER_CPU_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+IO_WORKERS = int(os.environ.get("REVIEWER_IO_WORKERS", "8"))
+# CPU workers are spawned, not forked: a fork taken while another thread holds
+# a lock (e.g. review_model._nlp_lock) leaves that lock held forever in the child.
+CPU_START_METHOD = os.environ.get("REVIEWER_CPU_START_METHOD", "spawn")
+
+_cpu_pool = None
+_io_pool = None
+_lock = threading.Lock()
+
+
+def _new_cpu_pool() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=CPU_WORKERS, mp_context=multiprocessing.get_context(CPU_START_METHOD))
+
+
+def get_cpu_pool() -> ProcessPoolExecutor:
+    """The shared CPU pool; a pool broken by a dead worker is replaced."""
+    global _cpu_pool
+    with _lock:
+        # _broken is set once a worker dies; such a pool refuses all new work
+        if _cpu_pool is not None and getattr(_cpu_pool, "_broken", False):
+            _cpu_pool.shutdown(wait=False, cancel_futures=True)
+            _cpu_pool = None
+        if _cpu_pool is None:
+            _cpu_pool = _new_cpu_pool()
+        return _cpu_pool
+
+
+def replace_cpu_pool(broken) -> ProcessPoolExecutor:
+    """
+    Called after `broken` raised BrokenProcessPool: replaces the shared pool
+    if it is still that pool, and returns the shared pool either way.
+    """
+    global _cpu_pool
+    with _lock:
+        if _cpu_pool is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            _cpu_pool = None
+        if _cpu_pool is None:
+            _cpu_pool = _new_cpu_pool()
+        return _cpu_pool
+
+
+def get_io_pool() -> ThreadPoolExecutor:
+    global _io_pool
+    with _lock:
+        if _io_pool is None:
+            _io_pool = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="review-io")
+        return _io_pool
+
+
+async def run_io(fn, *args, **kwargs):
+    """Runs a blocking call on the IO pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_io_pool(), functools.partial(fn, *args, **kwargs))
+
+
+def shutdown():
+    global _cpu_pool, _io_pool
+    with _lock:
+        if _cpu_pool is not None:
+            _cpu_pool.shutdown(wait=False, cancel_futures=True)
+            _cpu_pool = None
+        if _io_pool is not None:
+            _io_pool.shutdown(wait=False, cancel_futures=True)
+            _io_pool = None
@@ -1,7 +1,5 @@
 import streamlit as st
 import pandas as pd
-import os
-import tempfile
 import plotly.graph_objects as go
 import plotly.express as px
 import time
@@ -10,7 +8,7 @@ import time
 # Import the core review logic from your file
 # ------------------------------------------------------------------
 try:
-    from review_model import review_pdf, generate_final_report
+    from review_model import review_pdf_cached, generate_final_report
     from review_model import STRENGTH_PATTERNS, WEAKNESS_PATTERNS, IMPROVEMENT_PATTERNS
 except ImportError:
     st.error("Could not find 'review_model.py'. Please ensure it is in the same directory.")
@@ -295,6 +293,14 @@ with st.sidebar:
             index=0,
             help="Choose your locally installed Ollama model"
         )
+        bypass_cache = st.toggle("Bypass Review Cache", value=False,
+                                 help="Re-run the full review even if this exact PDF was reviewed before")
+
+    with st.expander("🧩 Pipeline Stages", expanded=False):
+        run_plagiarism = st.toggle("Plagiarism Check", value=True,
+                                   help="Search sampled sentences online or in the local plagiarism index")
+        run_deep_review = st.toggle("Expert AI Review", value=True,
+                                    help="LLM section reviews and the overall scorecard")
     
     with st.expander("🎯 Quality Thresholds", expanded=False):
         auto_reject_thresh = st.slider(
@@ -404,9 +410,8 @@ if uploaded_file is not None:
         status_text = st.empty()
         progress_message = st.empty()
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-        tmp_file.write(uploaded_file.getvalue())
-        pdf_path = tmp_file.name
+    # The review reads the PDF straight from memory, no temp file needed
+    pdf_bytes = uploaded_file.getvalue()
 
     try:
         # Progress Animation
@@ -424,7 +429,16 @@ if uploaded_file is not None:
         
         # Run the review logic
         with st.spinner("🔬 Deep analysis in progress..."):
-            review_results = review_pdf(pdf_path, rewrite=rewrite_toggle, ollama_model=model_choice)
+            # Only the selected stages run (and are cached) for this review
+            selected_stages = ["extract", "heuristics", "report"]
+            if run_plagiarism:
+                selected_stages.append("plagiarism")
+            if run_deep_review:
+                selected_stages += ["section_review", "scorecard"]
+            if rewrite_toggle:
+                selected_stages.append("rewrite")
+            review_results = review_pdf_cached(pdf_bytes, rewrite=rewrite_toggle, ollama_model=model_choice,
+                                               use_cache=not bypass_cache, stages=selected_stages)
 
         status_text.markdown("### ✅ Analysis Complete!")
         progress_bar.progress(100)
@@ -580,6 +594,15 @@ if uploaded_file is not None:
             else:
                 st.info(f"### ⚪ {risk_u}")
 
+        sources = review_results.get("plagiarism_sources") or []
+        if sources:
+            with st.expander(f"🔎 Matched Sources ({len(sources)})"):
+                for src in sources[:10]:
+                    label = src.get("title") or src.get("source", "unknown")
+                    st.markdown(f"**{label}** — {src.get('matched_sentences', 1)} matching sentence(s)")
+                    for example in src.get("examples", []):
+                        st.caption(f"“{example}”")
+
         # --- CONFIDENCE VISUALIZATION ---
         st.markdown("<br>", unsafe_allow_html=True)
         st.markdown("### 📊 Confidence Level Breakdown")
@@ -918,12 +941,6 @@ https://paperlens.ai
         with st.expander("🔍 View Error Details"):
             st.exception(e)
 
-    finally:
-        try:
-            os.remove(pdf_path)
-        except Exception:
-            pass
-
 else:
     # --- WELCOME SCREEN ---
     st.markdown("""
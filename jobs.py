@@ -0,0 +1,157 @@
+import os
+import queue
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from typing import Callable, Optional
+
+# -----------------------
+# Job queue settings
+# -----------------------
+JOB_WORKERS = int(os.environ.get("REVIEWER_JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.environ.get("REVIEWER_JOB_QUEUE_SIZE", "100"))
+JOB_TTL_SECONDS = float(os.environ.get("REVIEWER_JOB_TTL", "3600"))
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    """
+    One queued review. `fn(on_event)` does the work; "stage" events it emits
+    are recorded as per-stage progress.
+    """
+
+    def __init__(self, fn: Callable, label: str = ""):
+        self.id = uuid.uuid4().hex
+        self.fn = fn
+        self.label = label
+        self.status = "queued"
+        self.stages = []
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def on_event(self, event: str, data: dict):
+        if event == "stage":
+            self.stages.append({"stage": data.get("stage"), "at": round(time.time() - self.submitted_at, 3)})
+
+    def to_dict(self, include_result: bool = True) -> dict:
+        now = time.time()
+        out = {
+            "job_id": self.id,
+            "label": self.label,
+            "status": self.status,
+            "stage": self.stages[-1]["stage"] if self.stages else None,
+            "stages": list(self.stages),
+            "submitted_at": self.submitted_at,
+            "queue_seconds": round((self.started_at or now) - self.submitted_at, 3),
+            "run_seconds": round((self.finished_at or now) - self.started_at, 3) if self.started_at else None,
+        }
+        if self.error:
+            out["error"] = self.error
+        if include_result and self.status == "done":
+            out["result"] = self.result
+        return out
+
+
+class JobQueue:
+    """
+    Bounded FIFO of review jobs drained by a fixed pool of worker threads.
+    Finished jobs are kept for `ttl_seconds` so clients can poll the result.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, max_queued: int = JOB_QUEUE_SIZE,
+                 ttl_seconds: float = JOB_TTL_SECONDS):
+        self.workers = workers
+        self.ttl_seconds = ttl_seconds
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._queue_times = deque(maxlen=500)
+        self.completed = 0
+        self.failed = 0
+        self.expired = 0
+
+    def _ensure_workers(self):
+        with self._lock:
+            if self._threads:
+                return
+            for idx in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f"review-job-{idx}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def submit(self, fn: Callable, label: str = "") -> Job:
+        self._ensure_workers()
+        self.expire()
+        job = Job(fn, label)
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+            raise QueueFull(f"job queue is full ({self._queue.maxsize} waiting)")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self.expire()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            job.started_at = time.time()
+            job.status = "running"
+            self._queue_times.append(job.started_at - job.submitted_at)
+            try:
+                job.result = job.fn(job.on_event)
+                job.status = "done"
+                self.completed += 1
+            except Exception as e:
+                print(f"❌ Job {job.id} failed:", traceback.format_exc())
+                job.error = str(e)
+                job.status = "failed"
+                self.failed += 1
+            finally:
+                job.finished_at = time.time()
+                job.fn = None  # drop the uploaded bytes held by the closure
+                self._queue.task_done()
+
+    def expire(self):
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            stale = [jid for jid, j in self._jobs.items() if j.finished_at and j.finished_at < cutoff]
+            for jid in stale:
+                del self._jobs[jid]
+            self.expired += len(stale)
+
+    def stats(self) -> dict:
+        with self._lock:
+            statuses = [j.status for j in self._jobs.values()]
+        waits = sorted(self._queue_times)
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queued": self._queue.maxsize,
+            "workers": self.workers,
+            "running": statuses.count("running"),
+            "retained": len(statuses),
+            "completed": self.completed,
+            "failed": self.failed,
+            "expired": self.expired,
+            "time_in_queue": {
+                "mean": sum(waits) / len(waits) if waits else None,
+                "p50": waits[len(waits) // 2] if waits else None,
+                "p95": waits[min(len(waits) - 1, int(0.95 * len(waits)))] if waits else None,
+                "max": waits[-1] if waits else None,
+            },
+        }
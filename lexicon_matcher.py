@@ -0,0 +1,90 @@
+from collections import deque, namedtuple
+from typing import Dict, List, Optional
+
+# A single lexicon hit: which category, which phrase, and where it starts
+LexiconMatch = namedtuple("LexiconMatch", ["category", "pattern", "offset"])
+
+
+class LexiconMatcher:
+    """
+    Aho-Corasick automaton over several phrase lexicons.
+
+    All phrases of all categories are compiled into one trie with failure
+    links, so a sentence is scanned once no matter how many patterns there
+    are. Categories keep the order they were given in, which is also the
+    priority order used by `classify`.
+    """
+
+    def __init__(self, lexicons: Dict[str, List[str]]):
+        self.categories = list(lexicons.keys())
+        self._priority = {cat: idx for idx, cat in enumerate(self.categories)}
+
+        # Node i is represented by goto[i] (char -> node), fail[i] and out[i]
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for category, patterns in lexicons.items():
+            for pat in patterns:
+                pat = pat.lower()
+                if pat:
+                    self._add(pat, category)
+
+        self._build_failure_links()
+
+    def _add(self, pattern: str, category: str):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((category, pattern))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                # Inherit matches that end at the suffix node
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find_all(self, text: str) -> List[LexiconMatch]:
+        """
+        Returns every lexicon hit in `text` (case-insensitive), in the order
+        they end in the text.
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        matches = []
+        node = 0
+        for idx, ch in enumerate(text.lower()):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for category, pattern in out[node]:
+                matches.append(LexiconMatch(category, pattern, idx - len(pattern) + 1))
+        return matches
+
+    def classify(self, text: str) -> Optional[LexiconMatch]:
+        """
+        Returns the highest-priority hit (earliest in the text on ties), or None.
+        """
+        best = None
+        for m in self.find_all(text):
+            if best is None:
+                best = m
+                continue
+            rank, best_rank = self._priority[m.category], self._priority[best.category]
+            if rank < best_rank or (rank == best_rank and m.offset < best.offset):
+                best = m
+        return best
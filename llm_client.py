@@ -0,0 +1,290 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict, defaultdict
+from typing import Callable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+import metrics
+from review_cache import CACHE_DIR, ReviewCache
+
+# -----------------------
+# Ollama settings
+# -----------------------
+OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://localhost:11434")
+# Max requests in flight to Ollama from this process; match the server's OLLAMA_NUM_PARALLEL
+LLM_CONCURRENCY = int(os.environ.get("REVIEWER_LLM_CONCURRENCY") or os.environ.get("OLLAMA_NUM_PARALLEL") or "4")
+LLM_POOL_SIZE = int(os.environ.get("REVIEWER_LLM_POOL_SIZE", str(max(LLM_CONCURRENCY, 4))))
+LLM_CONNECT_TIMEOUT = float(os.environ.get("REVIEWER_LLM_CONNECT_TIMEOUT", "5"))
+LLM_CACHE_ENABLED = os.environ.get("REVIEWER_LLM_CACHE", "1") != "0"
+LLM_MEMORY_CACHE_SIZE = int(os.environ.get("REVIEWER_LLM_CACHE_SIZE", "1024"))
+LLM_DISK_CACHE_ENTRIES = int(os.environ.get("REVIEWER_LLM_DISK_CACHE_ENTRIES", "20000"))
+LLM_DISK_CACHE_TTL = float(os.environ.get("REVIEWER_LLM_CACHE_TTL", str(30 * 24 * 3600)))
+
+
+def prompt_cache_key(payload: dict, server: Optional[str] = None) -> str:
+    """
+    Hash of everything that determines the model output: the Ollama server
+    (OLLAMA_URL by default; two servers may serve different weights under one
+    model tag), model, system prompt, prompt and generation options.
+    "stream" only changes transport.
+    """
+    relevant = {k: v for k, v in payload.items() if k != "stream"}
+    relevant["_server"] = (server or OLLAMA_URL).rstrip("/")
+    raw = json.dumps(relevant, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(payload: dict, data: dict, validate: Optional[Callable[[dict], bool]] = None) -> bool:
+    """
+    Whether a reply may be cached: a JSON-mode ("format": "json") reply
+    must parse, and `validate(data)` (if given) must accept it. Anything
+    the caller would reject is not cached, so the next call asks again.
+    """
+    if payload.get("format") == "json":
+        try:
+            json.loads(data.get("response", ""))
+        except (TypeError, ValueError):
+            return False
+    if validate is None:
+        return True
+    try:
+        return bool(validate(data))
+    except Exception:
+        return False
+
+
+class LLMResponseCache:
+    """
+    Two tiers: an in-process LRU in front of the shared SQLite store.
+    Hit/miss counts are kept per call site.
+    """
+
+    def __init__(self, memory_size: int = LLM_MEMORY_CACHE_SIZE, disk: Optional[ReviewCache] = None):
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+        self._disk = disk
+        self._lock = threading.Lock()
+        self._counts = defaultdict(lambda: {"memory_hits": 0, "disk_hits": 0, "misses": 0})
+
+    @property
+    def disk(self) -> ReviewCache:
+        if self._disk is None:
+            self._disk = ReviewCache(max_entries=LLM_DISK_CACHE_ENTRIES, ttl_seconds=LLM_DISK_CACHE_TTL,
+                                     directory=CACHE_DIR, filename="llm_responses.sqlite3")
+        return self._disk
+
+    def _remember(self, key: str, value: dict):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str, call_site: str) -> Optional[dict]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._counts[call_site]["memory_hits"] += 1
+                return self._memory[key]
+
+        value = self.disk.get(key)
+        with self._lock:
+            if value is None:
+                self._counts[call_site]["misses"] += 1
+                return None
+            self._counts[call_site]["disk_hits"] += 1
+            self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: dict):
+        with self._lock:
+            self._remember(key, value)
+        self.disk.put(key, value)
+
+    def stats(self) -> dict:
+        with self._lock:
+            per_site = {}
+            for site, c in self._counts.items():
+                lookups = c["memory_hits"] + c["disk_hits"] + c["misses"]
+                hits = c["memory_hits"] + c["disk_hits"]
+                per_site[site] = dict(c, hit_rate=round(hits / lookups, 4) if lookups else 0.0)
+            return {"memory_entries": len(self._memory), "memory_size": self.memory_size, "call_sites": per_site}
+
+
+response_cache = LLMResponseCache()
+
+# Extra requests would only queue inside Ollama, so hold them here instead
+_inflight = threading.BoundedSemaphore(LLM_CONCURRENCY)
+
+
+# -----------------------
+# Pooled HTTP clients
+# -----------------------
+_session = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """
+    Process-wide keep-alive session. The adapter blocks instead of opening
+    more than LLM_POOL_SIZE connections, so worker threads share a bounded pool.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=LLM_POOL_SIZE, pool_block=True)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+def _timeouts(timeout: Optional[float]):
+    # Short connect timeout so a dead Ollama fails fast; `timeout` bounds the read
+    return (min(LLM_CONNECT_TIMEOUT, timeout), timeout) if timeout else (LLM_CONNECT_TIMEOUT, None)
+
+# One AsyncClient (and limiter) per event loop: httpx clients are bound to their loop
+_async_clients = weakref.WeakKeyDictionary()
+
+def _get_async_client():
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(loop)
+    if entry is None:
+        limits = httpx.Limits(max_connections=LLM_POOL_SIZE, max_keepalive_connections=LLM_POOL_SIZE)
+        entry = (httpx.AsyncClient(base_url=OLLAMA_URL, limits=limits), asyncio.Semaphore(LLM_CONCURRENCY))
+        _async_clients[loop] = entry
+    return entry
+
+def close():
+    """Closes the pooled sync session (see aclose for the async clients)."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+async def aclose():
+    """Closes the running loop's pooled AsyncClient; call it from the loop's shutdown hook."""
+    entry = _async_clients.pop(asyncio.get_running_loop(), None)
+    if entry is not None:
+        await entry[0].aclose()
+
+
+# -----------------------
+# Ollama /api/generate
+# -----------------------
+def generate(payload: dict, call_site: str = "default", timeout: Optional[float] = 60,
+             use_cache: bool = True, on_token: Optional[Callable[[str], None]] = None,
+             validate: Optional[Callable[[dict], bool]] = None) -> dict:
+    """
+    POSTs a request to Ollama and returns the decoded JSON body.
+    Identical requests are answered from the response cache. Raises on
+    connection errors and non-2xx responses; failures are never cached, and
+    neither are replies that fail is_cacheable(payload, data, validate).
+    With `on_token`, the request is streamed and every token is passed to
+    it as it arrives (a cache hit delivers the whole response as one token).
+    """
+    payload = dict(payload, stream=False)
+    key = prompt_cache_key(payload)
+    use_cache = use_cache and LLM_CACHE_ENABLED
+
+    if use_cache:
+        cached = response_cache.get(key, call_site)
+        if cached is not None:
+            if on_token is not None and cached.get("response"):
+                on_token(cached["response"])
+            return cached
+
+    started = time.perf_counter()
+    try:
+        if on_token is not None:
+            data = _post_streaming(payload, timeout, on_token)
+        else:
+            with _inflight:
+                resp = get_session().post(f"{OLLAMA_URL}/api/generate", json=payload, timeout=_timeouts(timeout))
+            resp.raise_for_status()
+            data = resp.json()
+    except Exception:
+        metrics.LLM_ERRORS.inc(call_site=call_site)
+        raise
+    metrics.observe_llm(call_site, time.perf_counter() - started, data)
+
+    if use_cache and is_cacheable(payload, data, validate):
+        response_cache.put(key, data)
+    return data
+
+
+def _post_streaming(payload: dict, timeout: Optional[float], on_token: Callable[[str], None]) -> dict:
+    """
+    Reads Ollama's NDJSON stream, forwarding each token, and returns the same
+    shape a non-streaming call would (full "response" plus the final stats).
+    """
+    parts, final = [], {}
+    with _inflight:
+        with get_session().post(f"{OLLAMA_URL}/api/generate", json=dict(payload, stream=True),
+                                timeout=_timeouts(timeout), stream=True) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(chunk["error"])
+                piece = chunk.get("response", "")
+                if piece:
+                    parts.append(piece)
+                    on_token(piece)
+                if chunk.get("done"):
+                    final = chunk
+    return dict(final, response="".join(parts), done=True)
+
+
+async def agenerate(payload: dict, call_site: str = "default", timeout: Optional[float] = 60,
+                    use_cache: bool = True, validate: Optional[Callable[[dict], bool]] = None) -> dict:
+    """
+    Async variant of generate(). Uses a pooled httpx.AsyncClient when httpx
+    is installed, otherwise runs generate() in a worker thread.
+    """
+    if httpx is None:
+        return await asyncio.to_thread(generate, payload, call_site, timeout, use_cache, validate=validate)
+
+    payload = dict(payload, stream=False)
+    key = prompt_cache_key(payload)
+    use_cache = use_cache and LLM_CACHE_ENABLED
+
+    if use_cache:
+        cached = response_cache.get(key, call_site)
+        if cached is not None:
+            return cached
+
+    client, limiter = _get_async_client()
+    connect, read = _timeouts(timeout)
+    started = time.perf_counter()
+    try:
+        async with limiter:
+            resp = await client.post("/api/generate", json=payload,
+                                     timeout=httpx.Timeout(read, connect=connect))
+        resp.raise_for_status()
+        data = resp.json()
+    except Exception:
+        metrics.LLM_ERRORS.inc(call_site=call_site)
+        raise
+    metrics.observe_llm(call_site, time.perf_counter() - started, data)
+
+    if use_cache and is_cacheable(payload, data, validate):
+        response_cache.put(key, data)
+    return data
+
+
+def cache_stats() -> dict:
+    return response_cache.stats()
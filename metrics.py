@@ -0,0 +1,273 @@
+"""
+Process-wide metrics in the Prometheus text exposition format, with no
+client library or external service. server.py and api.py serve render() at
+GET /metrics; point a local Prometheus at it:
+
+    scrape_configs:
+      - job_name: reviewer
+        static_configs: [{targets: ["localhost:8000"]}]
+"""
+import bisect
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# -----------------------
+# Bucket settings
+# -----------------------
+# Seconds; covers sub-millisecond lexicon passes up to multi-minute LLM calls
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+TOKENS_PER_SECOND_BUCKETS = (1, 2, 5, 10, 20, 30, 40, 60, 80, 120, 160, 240, 320)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+# -----------------------
+# Metric types
+# -----------------------
+_registry: List["_Metric"] = []
+_collectors: List[Callable[[], List[str]]] = []
+_registry_lock = threading.Lock()
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def _key(self, labels: dict) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_labels(self.labelnames, key)} {_num(value)}"
+                    for key, value in sorted(self._values.items())]
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self.samples()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            # counts[i] is observations in (buckets[i-1], buckets[i]]; the last slot is +Inf
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = 'le="' + _num(bound) + '"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_num(total)}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+def register_collector(fn: Callable[[], List[str]]):
+    """fn() returns ready-made exposition lines, computed at scrape time."""
+    with _registry_lock:
+        _collectors.append(fn)
+
+
+def render() -> str:
+    with _registry_lock:
+        metrics, collectors = list(_registry), list(_collectors)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    for collect in collectors:
+        try:
+            lines.extend(collect())
+        except Exception as e:
+            lines.append(f"# collector {getattr(collect, '__name__', collect)} failed: {_escape(e)}")
+    return "\n".join(lines) + "\n"
+
+
+# -----------------------
+# Reviewer metrics
+# -----------------------
+STAGE_SECONDS = Histogram("reviewer_stage_seconds", "Wall time of each review_pdf pipeline stage.", ("stage",))
+STAGE_CPU_SECONDS = Counter("reviewer_stage_cpu_seconds_total", "CPU time spent in each pipeline stage.", ("stage",))
+STEP_SECONDS = Histogram("reviewer_step_seconds",
+                         "Wall time of steps inside a stage (pdf_extraction, section_detection, spacy, classification).",
+                         ("step",))
+STAGE_ERRORS = Counter("reviewer_stage_errors_total", "Pipeline stages that failed or fell back.", ("stage",))
+CRITICAL_PATH = Counter("reviewer_critical_path_total", "Reviews whose critical path ran through each stage.", ("stage",))
+REVIEW_SECONDS = Histogram("reviewer_review_seconds", "Wall time of fresh (uncached) reviews.")
+
+LLM_SECONDS = Histogram("reviewer_llm_request_seconds", "Ollama /api/generate latency (cache misses only).",
+                        ("call_site",))
+LLM_TOKENS_PER_SECOND = Histogram("reviewer_llm_tokens_per_second",
+                                  "Ollama generation speed, eval_count / eval_duration.", ("call_site",),
+                                  buckets=TOKENS_PER_SECOND_BUCKETS)
+LLM_EVAL_TOKENS = Counter("reviewer_llm_eval_tokens_total", "Tokens generated by Ollama (eval_count).", ("call_site",))
+LLM_EVAL_SECONDS = Counter("reviewer_llm_eval_seconds_total", "Ollama generation time (eval_duration).", ("call_site",))
+LLM_PROMPT_TOKENS = Counter("reviewer_llm_prompt_tokens_total", "Prompt tokens evaluated by Ollama (prompt_eval_count).",
+                            ("call_site",))
+LLM_ERRORS = Counter("reviewer_llm_errors_total", "Ollama requests that raised.", ("call_site",))
+
+REQUESTS_IN_FLIGHT = Gauge("reviewer_requests_in_flight", "HTTP requests currently being served.")
+REQUESTS = Counter("reviewer_requests_total", "HTTP requests served.", ("method", "route", "status"))
+REQUEST_SECONDS = Histogram("reviewer_request_seconds", "HTTP request latency, to the last body byte.",
+                            ("method", "route"))
+
+
+def observe_review(meta: dict):
+    """Records a pipeline_dag.run_dag meta block."""
+    for stage, t in meta.get("stages", {}).items():
+        STAGE_SECONDS.observe(t["wall"], stage=stage)
+        STAGE_CPU_SECONDS.inc(t["cpu"], stage=stage)
+        for step, sec in (t.get("steps") or {}).items():
+            STEP_SECONDS.observe(sec, step=step)
+    for stage in meta.get("critical_path", {}).get("stages", []):
+        CRITICAL_PATH.inc(stage=stage)
+    if "wall_seconds" in meta:
+        REVIEW_SECONDS.observe(meta["wall_seconds"])
+
+
+def observe_llm(call_site: str, seconds: float, data: Optional[dict]):
+    """Records one uncached Ollama call; token speed comes from Ollama's own counters."""
+    LLM_SECONDS.observe(seconds, call_site=call_site)
+    data = data or {}
+    if data.get("prompt_eval_count"):
+        LLM_PROMPT_TOKENS.inc(data["prompt_eval_count"], call_site=call_site)
+    eval_count, eval_ns = data.get("eval_count"), data.get("eval_duration")
+    if eval_count and eval_ns:
+        LLM_EVAL_TOKENS.inc(eval_count, call_site=call_site)
+        LLM_EVAL_SECONDS.inc(eval_ns / 1e9, call_site=call_site)
+        LLM_TOKENS_PER_SECOND.observe(eval_count / (eval_ns / 1e9), call_site=call_site)
+
+
+def _cache_lines() -> List[str]:
+    # Imported here: these modules import metrics themselves
+    import llm_client
+    from online_plagiarism import lookup_cache_stats
+    from review_model import get_review_cache
+
+    rows = []  # (cache, hits, misses, entries)
+    review = get_review_cache().stats()
+    rows.append(("review", review["hits"], review["misses"], review["entries"]))
+    lookup = lookup_cache_stats()
+    if lookup.get("enabled", True):
+        rows.append(("plagiarism_lookup", lookup["hits"], lookup["misses"], lookup["entries"]))
+    llm = llm_client.cache_stats()
+    for site, c in sorted(llm["call_sites"].items()):
+        rows.append((f"llm:{site}", c["memory_hits"] + c["disk_hits"], c["misses"], None))
+
+    lines = []
+    for name, kind, help in (("reviewer_cache_hits_total", "counter", "Cache lookups that hit."),
+                             ("reviewer_cache_misses_total", "counter", "Cache lookups that missed."),
+                             ("reviewer_cache_hit_ratio", "gauge", "hits / (hits + misses) since start."),
+                             ("reviewer_cache_entries", "gauge", "Entries currently stored.")):
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+        for cache, hits, misses, entries in rows:
+            value = {"reviewer_cache_hits_total": hits, "reviewer_cache_misses_total": misses,
+                     "reviewer_cache_hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+                     "reviewer_cache_entries": entries}[name]
+            if value is not None:
+                lines.append(f'{name}{{cache="{_escape(cache)}"}} {_num(round(value, 6))}')
+    return lines
+
+
+register_collector(_cache_lines)
+
+
+# -----------------------
+# ASGI middleware
+# -----------------------
+class MetricsMiddleware:
+    """
+    Counts in-flight requests and per-route latency/status. Pure ASGI, so
+    streamed responses (SSE, NDJSON) are timed to their last chunk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # The matched route template (e.g. /jobs/{job_id}) keeps label values bounded
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            REQUESTS.inc(method=scope["method"], route=route, status=status[0])
+            REQUEST_SECONDS.observe(time.perf_counter() - started, method=scope["method"], route=route)
@@ -1,53 +1,151 @@
+import hashlib
+import os
 import random
+import re
+import threading
 import time
+import unicodedata
+from typing import Iterable, Iterator, Optional, Union
 try:
     from googlesearch import search
 except ImportError:
     search = None
 
-def check_plagiarism_google(text: str):
+import search_backends
+from review_cache import CACHE_DIR, ReviewCache
+
+# Sentences sampled per paper for the web search check
+SAMPLE_SIZE = int(os.environ.get("REVIEWER_PLAGIARISM_SAMPLES", "6"))
+
+# Local MinHash index (see plagiarism_index.py); used instead of Google when present
+PLAGIARISM_INDEX_DIR = os.environ.get("REVIEWER_PLAGIARISM_INDEX", "plagiarism_index")
+
+# Web search results per sentence fingerprint; drafts and papers from one lab share most sentences
+LOOKUP_CACHE_ENABLED = os.environ.get("REVIEWER_PLAGIARISM_CACHE", "1") != "0"
+LOOKUP_CACHE_ENTRIES = int(os.environ.get("REVIEWER_PLAGIARISM_CACHE_ENTRIES", "100000"))
+LOOKUP_CACHE_TTL = float(os.environ.get("REVIEWER_PLAGIARISM_CACHE_TTL", str(30 * 24 * 3600)))
+
+def iter_candidate_sentences(text: Union[str, Iterable[str]]) -> Iterator[str]:
     """
-    Real-time check by searching random sentences on Google.
-    Returns: plagiarism_percent, originality_percent, risk_level
+    Yields sentences worth searching for (> 10 words).
+    Accepts the full text or any iterable of page texts, which is consumed lazily.
     """
+    pages = [text] if isinstance(text, str) else text
+    carry = ""
+    for page in pages:
+        parts = (carry + page).split('.')
+        # The last piece may continue on the next page
+        carry = parts.pop()
+        for s in parts:
+            if len(s.split()) > 10:
+                yield s.strip()
+    if len(carry.split()) > 10:
+        yield carry.strip()
+
+def reservoir_sample(items: Iterable, k: int, rng=random) -> list:
+    """
+    Uniform sample of up to k items from a stream without materializing it.
+    """
+    sample = []
+    for idx, item in enumerate(items):
+        if idx < k:
+            sample.append(item)
+        else:
+            j = rng.randint(0, idx)
+            if j < k:
+                sample[j] = item
+    return sample
+
+_WORD_RE = re.compile(r"\w+")
+
+def normalize_sentence(sentence: str) -> str:
+    """The sentence's words, lowercased and NFKC-normalized, joined by single spaces."""
+    return " ".join(_WORD_RE.findall(unicodedata.normalize("NFKC", sentence).lower()))
+
+def sentence_fingerprint(sentence: str, backend: str = "") -> str:
+    """
+    Hash of the sentence with case, punctuation, spacing and Unicode forms
+    normalized away, so trivially reformatted copies share one cache entry.
+    """
+    return hashlib.sha256(f"{backend}\n{normalize_sentence(sentence)}".encode("utf-8")).hexdigest()
+
+def sample_seed(sentences: Iterable[str]) -> str:
+    """Seed for a paper's sentence sample: depends only on the normalized sentence texts."""
+    normalized = sorted(normalize_sentence(s) for s in sentences)
+    return hashlib.sha256("\n".join(normalized).encode("utf-8")).hexdigest()
+
+_lookup_cache = None
+_lookup_cache_lock = threading.Lock()
+
+def get_lookup_cache() -> ReviewCache:
+    global _lookup_cache
+    with _lookup_cache_lock:
+        if _lookup_cache is None:
+            _lookup_cache = ReviewCache(directory=CACHE_DIR, max_entries=LOOKUP_CACHE_ENTRIES,
+                                        ttl_seconds=LOOKUP_CACHE_TTL, filename="plagiarism_lookups.sqlite3")
+        return _lookup_cache
+
+def lookup_cache_stats() -> dict:
+    return get_lookup_cache().stats() if LOOKUP_CACHE_ENABLED else {"enabled": False}
+
+def check_plagiarism_google(text: Union[str, Iterable[str]], stats: Optional[dict] = None):
+    """
+    Real-time check by web-searching sampled sentences (Google by default,
+    see search_backends). `text` is the full paper text or an iterable of page texts.
+    The sample (up to SAMPLE_SIZE sentences) is seeded by the paper's own
+    normalized sentences (see sample_seed), so a paper always gets the same
+    sample and the same score, whatever the backend and however much of it
+    is already cached. Sampled sentences with a cached
+    result (by fingerprint) skip the search; the rest are searched and cached.
+    `stats`, if given, receives how many sampled sentences were cached vs searched.
+    Returns: plagiarism_percent, originality_percent, risk_level, sources
+    """
+    backend = search_backends.get_backend(search_fn=search)
     # Fallback if library is missing
-    if not search:
-        return 0, 100, "MISSING_LIB"
+    if backend is None:
+        return 0, 100, "MISSING_LIB", []
 
     # 1. Preprocess: Split text into sentences
     # We only take sentences > 10 words to avoid common phrases
-    sentences = [s.strip() for s in text.split('.') if len(s.split()) > 10]
-    
-    if not sentences:
-        return 0, 100, "LOW"
+    sentences = {}
+    for sent in iter_candidate_sentences(text):
+        sentences.setdefault(sentence_fingerprint(sent, backend.name), sent)
 
-    # 2. Pick up to 3 random sentences to check (to save time/rate limits)
-    # We limit to 3 searches to avoid Google 429 (Too Many Requests) errors
-    samples = random.sample(sentences, min(len(sentences), 3))
-    detected_sources = []
+    # 2. Sample first, then reuse earlier lookups for the sampled sentences only
+    rng = random.Random(sample_seed(sentences.values()))
+    sample = reservoir_sample(sentences, SAMPLE_SIZE, rng=rng)
+    cached = get_lookup_cache().get_many(sample) if LOOKUP_CACHE_ENABLED else {}
+    answered = [(sentences[fp], cached[fp]["url"]) for fp in sample if fp in cached]
+    to_search = [fp for fp in sample if fp not in cached]
+    if stats is not None:
+        stats.update(sentences=len(sentences), sampled=len(sample), cached=len(answered),
+                     searched=len(to_search))
 
-    try:
-        for sample in samples:
-            # Search Google for the exact phrase
-            query = f'"{sample}"'
-            
-            # We just need to know if results exist
-            results = list(search(query, num_results=1, advanced=True))
-            
-            if len(results) > 0:
-                detected_sources.append(results[0].url)
-            
-            # Sleep to be polite to Google and avoid blocks
-            time.sleep(2)
+    if not answered and not to_search:
+        return 0, 100, "LOW", []
 
-    except Exception as e:
-        print(f"Search failed: {e}")
-        # FAIL-SAFE: If Google blocks us, switch to simulation mode
-        return check_plagiarism_simulation()
+    # Queries run concurrently behind a shared token bucket (no fixed sleeps);
+    # 429s are retried with exponential backoff
+    results = search_backends.search_many(backend, [sentences[fp] for fp in to_search])
+    fresh = {fp: {"url": r, "checked_at": time.time()}
+             for fp, r in zip(to_search, results) if not isinstance(r, Exception)}
+    if fresh and LOOKUP_CACHE_ENABLED:
+        get_lookup_cache().put_many(fresh)
+    answered += [(sentences[fp], entry["url"]) for fp, entry in fresh.items()]
+
+    if not answered:
+        print(f"Search failed: {results[0]}")
+        # FAIL-SAFE: If every query failed, switch to simulation mode
+        if stats is not None:
+            stats["method"] = "simulation"
+        return check_plagiarism_simulation() + ([],)
+
+    detected_sources = [{"source": url, "matched_sentences": 1, "examples": [sample]}
+                        for sample, url in answered if url]
 
     # 3. Calculate Score
-    # If 2 out of 3 sampled sentences are found online -> High Plagiarism
-    hit_ratio = len(detected_sources) / len(samples) if samples else 0
+    # If 2 out of 3 checked sentences are found online -> High Plagiarism
+    hit_ratio = len(detected_sources) / len(answered)
     
     plagiarism_percent = int(hit_ratio * 100)
     originality_percent = 100 - plagiarism_percent
@@ -59,7 +157,7 @@ def check_plagiarism_google(text: str):
     else:
         risk = "LOW"
 
-    return plagiarism_percent, originality_percent, risk
+    return plagiarism_percent, originality_percent, risk, detected_sources
 
 
 def check_plagiarism_simulation():
@@ -81,11 +179,43 @@ def check_plagiarism_simulation():
         
     return plag, orig, risk
 
+_local_index = None
+_local_index_lock = threading.Lock()
+
+def get_local_index():
+    """
+    The offline PlagiarismIndex at PLAGIARISM_INDEX_DIR, opened once, or None
+    if no index has been built there.
+    """
+    global _local_index
+    with _local_index_lock:
+        if _local_index is None and os.path.exists(os.path.join(PLAGIARISM_INDEX_DIR, "meta.json")):
+            from plagiarism_index import PlagiarismIndex
+            _local_index = PlagiarismIndex(PLAGIARISM_INDEX_DIR)
+        return _local_index
+
 # Wrapper function to replace the old one
-def check_plagiarism_smallseotools(text: str):
+def check_plagiarism_smallseotools(text: Union[str, Iterable[str]], stats: Optional[dict] = None):
+    """
+    Returns: plagiarism_percent, originality_percent, risk_level, sources
+    Every sentence is checked against the local index when one is built;
+    otherwise a few sampled sentences are searched on Google.
+    `stats`, if given, is filled with the method used and lookup counts.
+    """
+    stats = {} if stats is None else stats
+    try:
+        index = get_local_index()
+        if index is not None:
+            stats["method"] = "index"
+            return index.check(text)
+    except Exception as e:
+        print(f"Local plagiarism index failed: {e}")
+
     # Try the real Google check first
     try:
-        return check_plagiarism_google(text)
+        stats["method"] = "web"
+        return check_plagiarism_google(text, stats=stats)
     except:
         # If anything breaks, fail gracefully to simulation
-        return check_plagiarism_simulation()
\ No newline at end of file
+        stats["method"] = "simulation"
+        return check_plagiarism_simulation() + ([],)
\ No newline at end of file
@@ -0,0 +1,105 @@
+import multiprocessing
+import os
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+
+import fitz  # PyMuPDF
+
+from executors import get_cpu_pool
+
+# -----------------------
+# Parallel extraction settings
+# -----------------------
+# Off (0) until set from a measurement: benchmarks/bench_extract.py reports the
+# page count above which the process pool beats serial extraction on a machine.
+PARALLEL_MIN_PAGES = int(os.environ.get("REVIEWER_PARALLEL_MIN_PAGES", "0"))
+PARALLEL_MAX_WORKERS = int(os.environ.get("REVIEWER_PARALLEL_WORKERS", "0")) or (os.cpu_count() or 1)
+
+
+# A PDF can be given as a path, raw bytes or a readable binary buffer
+PdfSource = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO]
+
+
+def load_pdf_source(source: PdfSource) -> Union[str, bytes]:
+    """
+    Normalizes a PDF source to a path or bytes. Buffers are read once here so
+    the same source can be hashed and opened several times.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if hasattr(source, "read"):
+        return source.read()
+    raise TypeError(f"Unsupported PDF source: {type(source).__name__}")
+
+
+def open_pdf(source: PdfSource) -> fitz.Document:
+    source = load_pdf_source(source)
+    if isinstance(source, bytes):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+# -----------------------
+# PDF → Text
+# -----------------------
+def iter_pages(pdf_path: PdfSource) -> Iterator[Tuple[int, str]]:
+    """
+    Yields (page_number, page_text) one page at a time, page numbers 1-based.
+    The document is closed as soon as the generator finishes or is discarded.
+    """
+    with open_pdf(pdf_path) as doc:
+        for page in doc:
+            yield page.number + 1, page.get_text()
+
+
+def page_count(pdf_path: PdfSource) -> int:
+    with open_pdf(pdf_path) as doc:
+        return doc.page_count
+
+
+def _extract_page_range(pdf_path: Union[str, bytes], start: int, stop: int) -> str:
+    """
+    Worker: opens the PDF on its own and extracts pages [start, stop).
+    """
+    with open_pdf(pdf_path) as doc:
+        return "".join(doc[i].get_text() for i in range(start, stop))
+
+
+def _page_ranges(n_pages: int, n_chunks: int) -> List[Tuple[int, int]]:
+    step, extra = divmod(n_pages, n_chunks)
+    ranges, start = [], 0
+    for idx in range(n_chunks):
+        stop = start + step + (1 if idx < extra else 0)
+        if stop > start:
+            ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def extract_text_parallel(pdf_path: PdfSource, max_workers: Optional[int] = None) -> str:
+    """
+    Splits the page range into `max_workers` chunks, extracts them on the
+    shared CPU pool (executors.get_cpu_pool) and joins the text back in page
+    order. In-memory PDFs are sent to each worker as bytes.
+    """
+    pdf_path = load_pdf_source(pdf_path)
+    workers = max_workers or PARALLEL_MAX_WORKERS
+    ranges = _page_ranges(page_count(pdf_path), workers)
+    parts = get_cpu_pool().map(_extract_page_range, [pdf_path] * len(ranges),
+                               [r[0] for r in ranges], [r[1] for r in ranges])
+    return "".join(parts)
+
+
+def extract_text_from_pdf(pdf_path: PdfSource, parallel: bool = False, max_workers: Optional[int] = None) -> str:
+    """
+    Full document text from a path, bytes or buffer. With parallel=True and
+    PARALLEL_MIN_PAGES set, documents of at least that many pages use the
+    CPU pool. Inside a pool worker extraction is always serial.
+    """
+    pdf_path = load_pdf_source(pdf_path)
+    workers = max_workers or PARALLEL_MAX_WORKERS
+    if (parallel and PARALLEL_MIN_PAGES and workers > 1 and multiprocessing.parent_process() is None
+            and page_count(pdf_path) >= PARALLEL_MIN_PAGES):
+        return extract_text_parallel(pdf_path, max_workers=workers)
+    return "".join(page_text for _, page_text in iter_pages(pdf_path))
@@ -0,0 +1,190 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class Stage:
+    """
+    One node of the review DAG. `fn(**inputs)` returns a dict holding exactly
+    `outputs`. kind="cpu" stages go to the CPU pool (a process pool, so `fn`
+    must be a picklable top-level function); "io" stages go to a thread.
+    A stage may also return {"_steps": {step: seconds}} to report the timing
+    of its own sub-steps; it ends up in the stage's meta as "steps".
+    """
+
+    def __init__(self, name: str, fn: Callable[..., dict], inputs: Iterable[str] = (),
+                 outputs: Iterable[str] = (), kind: str = "io"):
+        if kind not in ("cpu", "io"):
+            raise ValueError(f"Stage {name}: kind must be 'cpu' or 'io', not {kind!r}")
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.kind = kind
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, {self.inputs} -> {self.outputs}, {self.kind})"
+
+
+def _timed(fn, kwargs):
+    # Runs in the worker (thread or process), so CPU time is the worker's own
+    wall0, cpu0 = time.perf_counter(), time.thread_time()
+    out = fn(**kwargs)
+    steps = out.pop("_steps", None) if isinstance(out, dict) else None
+    return out, time.perf_counter() - wall0, time.thread_time() - cpu0, steps
+
+
+def plan(stages: List[Stage], provided: Iterable[str] = ()) -> Dict[str, Tuple[str, ...]]:
+    """
+    Stage name -> names of the stages it waits for, derived from declared
+    inputs and outputs. Raises ValueError for duplicate producers, inputs
+    nobody provides, and cycles.
+    """
+    provided = set(provided)
+    producer = {}
+    for stage in stages:
+        for key in stage.outputs:
+            if key in producer or key in provided:
+                raise ValueError(f"{key!r} is produced twice ({producer.get(key, 'input')} and {stage.name})")
+            producer[key] = stage.name
+
+    deps = {}
+    for stage in stages:
+        missing = [key for key in stage.inputs if key not in producer and key not in provided]
+        if missing:
+            raise ValueError(f"Stage {stage.name} needs {', '.join(missing)}, which nothing provides")
+        deps[stage.name] = tuple(dict.fromkeys(producer[key] for key in stage.inputs if key in producer))
+
+    # Kahn's algorithm, only to reject cycles up front
+    remaining = {name: set(d) for name, d in deps.items()}
+    while remaining:
+        ready = [name for name, d in remaining.items() if not d]
+        if not ready:
+            raise ValueError(f"Stage cycle between {', '.join(sorted(remaining))}")
+        for name in ready:
+            del remaining[name]
+        for d in remaining.values():
+            d.difference_update(ready)
+    return deps
+
+
+def critical_path(deps: Dict[str, Tuple[str, ...]], timings: Dict[str, dict]) -> dict:
+    """
+    The chain of stages that bounded total latency: starting from the stage
+    that finished last, repeatedly step to the dependency that finished last.
+    """
+    if not timings:
+        return {"stages": [], "seconds": 0.0}
+    name = max(timings, key=lambda n: timings[n]["end"])
+    path = [name]
+    while deps.get(name):
+        name = max(deps[name], key=lambda n: timings[n]["end"])
+        path.append(name)
+    path.reverse()
+    return {"stages": path, "seconds": timings[path[-1]]["end"],
+            "busy_seconds": round(sum(timings[n]["wall"] for n in path), 4)}
+
+
+def run_dag(stages: List[Stage], context: dict, cpu_pool: Optional[Executor] = None,
+            io_pool: Optional[Executor] = None, on_done: Optional[Callable[[str, dict], None]] = None,
+            on_error: Optional[Callable[[str, BaseException], None]] = None,
+            replace_cpu_pool: Optional[Callable[[Executor], Executor]] = None) -> Tuple[dict, dict]:
+    """
+    Runs every stage as soon as the stages it depends on have finished;
+    independent stages run side by side. `context` holds the initial inputs
+    and receives each stage's outputs. Without a cpu_pool, CPU stages run on
+    the IO pool; without an io_pool, a private thread pool is used (never
+    pass a pool whose threads may be blocked waiting on this call).
+    If the cpu_pool breaks (BrokenProcessPool, e.g. a worker was killed),
+    replace_cpu_pool(broken_pool) is asked for a new pool and each affected
+    stage is retried once on it.
+
+    on_done(name, outputs) is called from the calling thread as each stage
+    finishes, and on_error(name, exc) when one raises. Returns (context, meta)
+    where meta is
+        {"stages": {name: {"kind", "wall", "cpu", "start", "end"[, "steps"]}},
+         "critical_path": {"stages", "seconds", "busy_seconds"}, "wall_seconds"}
+    with "start"/"end" in seconds since the run began and "cpu" the
+    worker's CPU time. The first failing stage's exception is re-raised once
+    running stages finish; stages not yet started are dropped.
+    """
+    deps = plan(stages, provided=context)
+    by_name = {stage.name: stage for stage in stages}
+    own_pool = io_pool is None
+    if own_pool:
+        io_pool = ThreadPoolExecutor(max_workers=max(1, len(stages)), thread_name_prefix="review-stage")
+
+    started = time.perf_counter()
+    finished, timings, running, retried = set(), {}, {}, set()
+    error = None
+
+    def renew_cpu_pool(broken, name) -> bool:
+        # One retry per stage, on a fresh pool
+        nonlocal cpu_pool
+        if replace_cpu_pool is None or name in retried:
+            return False
+        retried.add(name)
+        if cpu_pool is broken:
+            cpu_pool = replace_cpu_pool(broken)
+        return True
+
+    def submit(name):
+        stage = by_name[name]
+        pool = cpu_pool if stage.kind == "cpu" and cpu_pool is not None else io_pool
+        kwargs = {key: context[key] for key in stage.inputs}
+        try:
+            fut = pool.submit(_timed, stage.fn, kwargs)
+        except BrokenProcessPool:
+            if pool is io_pool or not renew_cpu_pool(pool, name):
+                raise
+            fut = cpu_pool.submit(_timed, stage.fn, kwargs)
+        running[fut] = (name, pool)
+
+    def submit_ready():
+        for name in by_name:
+            if name in finished or any(n == name for n, _ in running.values()) or not set(deps[name]) <= finished:
+                continue
+            submit(name)
+
+    try:
+        submit_ready()
+        while running:
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in done:
+                name, pool = running.pop(fut)
+                try:
+                    try:
+                        out, wall, cpu, steps = fut.result()
+                    except BrokenProcessPool:
+                        if pool is io_pool or not renew_cpu_pool(pool, name):
+                            raise
+                        submit(name)
+                        continue
+                    missing = set(by_name[name].outputs) - set(out or {})
+                    if missing:
+                        raise ValueError(f"Stage {name} did not return {', '.join(sorted(missing))}")
+                except Exception as e:
+                    error = error or e
+                    if on_error:
+                        on_error(name, e)
+                    continue
+                end = time.perf_counter() - started
+                timings[name] = {"kind": by_name[name].kind, "wall": round(wall, 4), "cpu": round(cpu, 4),
+                                 "start": round(max(0.0, end - wall), 4), "end": round(end, 4)}
+                if steps:
+                    timings[name]["steps"] = {step: round(sec, 4) for step, sec in steps.items()}
+                context.update({key: out[key] for key in by_name[name].outputs})
+                finished.add(name)
+                if on_done:
+                    on_done(name, out)
+            if error is None:
+                submit_ready()
+    finally:
+        if own_pool:
+            io_pool.shutdown(wait=True)
+
+    if error is not None:
+        raise error
+    return context, {"stages": timings, "critical_path": critical_path(deps, timings),
+                     "wall_seconds": round(time.perf_counter() - started, 4)}
@@ -0,0 +1,313 @@
+"""
+Offline plagiarism index: word shingles -> MinHash signatures -> LSH buckets.
+
+Build it once from a local corpus, then check every sentence of a paper
+against it without touching the network:
+
+    python plagiarism_index.py build corpus.jsonl papers_dir/ --out plagiarism_index
+    python plagiarism_index.py query paper.pdf --index plagiarism_index
+
+On disk an index is a directory of .npy arrays (opened memory-mapped, so
+only the pages a query touches are read) plus meta.json and docs.jsonl.
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import time
+import zlib
+from collections import OrderedDict
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from online_plagiarism import iter_candidate_sentences
+
+# -----------------------
+# Index settings
+# -----------------------
+INDEX_FORMAT_VERSION = 1
+SHINGLE_SIZE = 3           # words per shingle
+NUM_PERM = 64              # MinHash permutations
+LSH_BANDS = 16             # NUM_PERM / LSH_BANDS rows per band
+MATCH_THRESHOLD = 0.5      # estimated Jaccard a sentence needs to count as copied
+MIN_SENTENCE_WORDS = 10    # same cut-off as the online check
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_WORD_RE = re.compile(r"\w+")
+
+
+# -----------------------
+# Shingles & MinHash
+# -----------------------
+def shingle_hashes(sentence: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """32-bit hashes of the sentence's lower-cased word `size`-grams."""
+    words = _WORD_RE.findall(sentence.lower())
+    if len(words) < size:
+        words = words + [""] * (size - len(words))
+    grams = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+class MinHasher:
+    """
+    NUM_PERM universal hash functions (a*x + b mod 2^61-1), seeded so that
+    an index and its queries always agree.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        # Keep a below 2^32 so a*x (x < 2^32) cannot overflow uint64
+        self.a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        if hashes.size == 0:
+            return np.full(self.num_perm, np.iinfo(np.uint32).max, dtype=np.uint32)
+        values = (np.outer(hashes, self.a) + self.b) % _MERSENNE
+        return (values.min(axis=0) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+    def signatures(self, sentences: List[str], shingle_size: int = SHINGLE_SIZE) -> np.ndarray:
+        out = np.empty((len(sentences), self.num_perm), dtype=np.uint32)
+        for idx, sent in enumerate(sentences):
+            out[idx] = self.signature(shingle_hashes(sent, shingle_size))
+        return out
+
+
+def band_hashes(signatures: np.ndarray, bands: int) -> np.ndarray:
+    """(n, bands) uint64 keys: one polynomial hash per band of rows."""
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    sig = signatures[:, :bands * rows].astype(np.uint64).reshape(n, bands, rows)
+    keys = np.zeros((n, bands), dtype=np.uint64)
+    for r in range(rows):
+        # uint64 arithmetic wraps, which is all a hash needs
+        keys = keys * np.uint64(1000003) + sig[:, :, r]
+    return keys
+
+
+def paper_sentences(text: Union[str, Iterable[str]]) -> List[str]:
+    return [s for s in iter_candidate_sentences(text) if len(s.split()) >= MIN_SENTENCE_WORDS]
+
+
+# -----------------------
+# Corpus readers
+# -----------------------
+def iter_corpus(paths: List[str]) -> Iterator[Tuple[dict, str]]:
+    """
+    Yields (doc_meta, text) from JSONL files ({"text", optional "source"/"url",
+    "title", "id"} per line), PDF files and directories of PDFs.
+    """
+    from pdf_extraction import extract_text_from_pdf
+
+    def from_pdf(path):
+        try:
+            return extract_text_from_pdf(path)
+        except Exception as e:
+            print(f"⚠️  Skipping {path}: {e}")
+            return None
+
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, _, filenames in os.walk(path):
+                for name in sorted(filenames):
+                    if name.lower().endswith(".pdf"):
+                        full = os.path.join(dirpath, name)
+                        text = from_pdf(full)
+                        if text:
+                            yield {"source": full, "title": name}, text
+        elif path.lower().endswith(".pdf"):
+            text = from_pdf(path)
+            if text:
+                yield {"source": path, "title": os.path.basename(path)}, text
+        else:
+            with open(path, encoding="utf-8") as f:
+                for line_no, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    doc = json.loads(line)
+                    text = doc.pop("text", "")
+                    doc.setdefault("source", doc.get("url") or doc.get("id") or f"{path}:{line_no}")
+                    if text:
+                        yield doc, text
+
+
+# -----------------------
+# Build
+# -----------------------
+def build_index(corpus: Iterable[Tuple[dict, str]], out_dir: str, num_perm: int = NUM_PERM,
+                bands: int = LSH_BANDS, shingle_size: int = SHINGLE_SIZE, seed: int = 1) -> dict:
+    """
+    Signs every sentence of every (doc_meta, text) pair and writes the index
+    to `out_dir` (replaced atomically once complete). Returns the meta dict.
+    """
+    hasher = MinHasher(num_perm, seed)
+    sig_parts, doc_ids, docs = [], [], []
+    for doc_meta, text in corpus:
+        sentences = paper_sentences(text)
+        if not sentences:
+            continue
+        sig_parts.append(hasher.signatures(sentences, shingle_size))
+        doc_ids.append(np.full(len(sentences), len(docs), dtype=np.uint32))
+        docs.append(doc_meta)
+
+    signatures = np.concatenate(sig_parts) if sig_parts else np.empty((0, num_perm), dtype=np.uint32)
+    sentence_docs = np.concatenate(doc_ids) if doc_ids else np.empty(0, dtype=np.uint32)
+
+    # Per band: keys sorted for binary search, and the sentence id behind each key
+    keys = band_hashes(signatures, bands).T
+    order = np.argsort(keys, axis=1, kind="stable").astype(np.uint32)
+    sorted_keys = np.take_along_axis(keys, order.astype(np.int64), axis=1)
+
+    meta = {"version": INDEX_FORMAT_VERSION, "num_perm": num_perm, "bands": bands,
+            "shingle_size": shingle_size, "seed": seed, "threshold": MATCH_THRESHOLD,
+            "documents": len(docs), "sentences": int(signatures.shape[0]), "built_at": time.time()}
+
+    tmp_dir = out_dir.rstrip("/\\") + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    np.save(os.path.join(tmp_dir, "signatures.npy"), signatures)
+    np.save(os.path.join(tmp_dir, "sentence_docs.npy"), sentence_docs)
+    np.save(os.path.join(tmp_dir, "band_keys.npy"), sorted_keys)
+    np.save(os.path.join(tmp_dir, "band_ids.npy"), order)
+    with open(os.path.join(tmp_dir, "docs.jsonl"), "w", encoding="utf-8") as f:
+        for doc in docs:
+            f.write(json.dumps(doc, ensure_ascii=False) + "\n")
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return meta
+
+
+# -----------------------
+# Query
+# -----------------------
+class PlagiarismIndex:
+    """
+    Read-only view of a built index. Arrays are memory-mapped, so opening
+    is cheap and several processes share the page cache.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json")) as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported plagiarism index version {self.meta.get('version')}")
+        load = lambda name: np.load(os.path.join(directory, name), mmap_mode="r")
+        self.signatures = load("signatures.npy")
+        self.sentence_docs = load("sentence_docs.npy")
+        self.band_keys = load("band_keys.npy")
+        self.band_ids = load("band_ids.npy")
+        with open(os.path.join(directory, "docs.jsonl"), encoding="utf-8") as f:
+            self.docs = [json.loads(line) for line in f]
+        self.hasher = MinHasher(self.meta["num_perm"], self.meta["seed"])
+        self.threshold = self.meta.get("threshold", MATCH_THRESHOLD)
+
+    def match_sentences(self, sentences: List[str]) -> List[Optional[Tuple[int, float]]]:
+        """
+        For each sentence, (doc_id, estimated Jaccard) of its best match at or
+        above the threshold, or None.
+        """
+        if not sentences or self.signatures.shape[0] == 0:
+            return [None] * len(sentences)
+        sigs = self.hasher.signatures(sentences, self.meta["shingle_size"])
+        keys = band_hashes(sigs, self.meta["bands"])
+
+        candidates = [set() for _ in sentences]
+        for band in range(self.meta["bands"]):
+            column = self.band_keys[band]
+            lo = np.searchsorted(column, keys[:, band], side="left")
+            hi = np.searchsorted(column, keys[:, band], side="right")
+            for q in np.nonzero(hi > lo)[0]:
+                candidates[q].update(self.band_ids[band, lo[q]:hi[q]].tolist())
+
+        matches = []
+        for q, cands in enumerate(candidates):
+            if not cands:
+                matches.append(None)
+                continue
+            ids = np.fromiter(cands, dtype=np.int64, count=len(cands))
+            sims = (self.signatures[ids] == sigs[q]).mean(axis=1)
+            best = int(sims.argmax())
+            if sims[best] >= self.threshold:
+                matches.append((int(self.sentence_docs[ids[best]]), float(sims[best])))
+            else:
+                matches.append(None)
+        return matches
+
+    def check(self, text: Union[str, Iterable[str]], max_examples: int = 3):
+        """
+        Checks every candidate sentence of the paper.
+        Returns: plagiarism_percent, originality_percent, risk_level, sources
+        where sources lists the matched corpus documents, most matches first.
+        """
+        sentences = paper_sentences(text)
+        if not sentences:
+            return 0, 100, "LOW", []
+
+        by_doc = OrderedDict()
+        matched = 0
+        for sent, hit in zip(sentences, self.match_sentences(sentences)):
+            if hit is None:
+                continue
+            matched += 1
+            doc_id, sim = hit
+            entry = by_doc.setdefault(doc_id, dict(self.docs[doc_id], matched_sentences=0,
+                                                   max_similarity=0.0, examples=[]))
+            entry["matched_sentences"] += 1
+            entry["max_similarity"] = round(max(entry["max_similarity"], sim), 3)
+            if len(entry["examples"]) < max_examples:
+                entry["examples"].append(sent)
+
+        plagiarism_percent = int(100 * matched / len(sentences))
+        sources = sorted(by_doc.values(), key=lambda d: -d["matched_sentences"])
+        return plagiarism_percent, 100 - plagiarism_percent, risk_level(plagiarism_percent), sources
+
+
+def risk_level(plagiarism_percent: int) -> str:
+    if plagiarism_percent > 50:
+        return "HIGH"
+    elif plagiarism_percent > 0:
+        return "MEDIUM"
+    return "LOW"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="index JSONL files, PDFs and PDF directories")
+    build.add_argument("inputs", nargs="+")
+    build.add_argument("--out", default="plagiarism_index")
+    build.add_argument("--num-perm", type=int, default=NUM_PERM)
+    build.add_argument("--bands", type=int, default=LSH_BANDS)
+    build.add_argument("--shingle-size", type=int, default=SHINGLE_SIZE)
+    query = sub.add_parser("query", help="check a PDF against an index")
+    query.add_argument("pdf")
+    query.add_argument("--index", default="plagiarism_index")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        t0 = time.perf_counter()
+        meta = build_index(iter_corpus(args.inputs), args.out, num_perm=args.num_perm,
+                           bands=args.bands, shingle_size=args.shingle_size)
+        print(f"✅ Indexed {meta['sentences']} sentences from {meta['documents']} documents "
+              f"into {args.out} in {time.perf_counter() - t0:.1f}s")
+    else:
+        from pdf_extraction import extract_text_from_pdf
+        index = PlagiarismIndex(args.index)
+        text = extract_text_from_pdf(args.pdf)
+        t0 = time.perf_counter()
+        percent, originality, risk, sources = index.check(text)
+        print(json.dumps({"plagiarism_percent": percent, "originality_percent": originality, "risk": risk,
+                          "sources": sources, "seconds": round(time.perf_counter() - t0, 4)}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
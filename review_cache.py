@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+# -----------------------
+# Cache settings
+# -----------------------
+CACHE_DIR = os.environ.get("REVIEWER_CACHE_DIR", ".review_cache")
+CACHE_MAX_ENTRIES = int(os.environ.get("REVIEWER_CACHE_MAX_ENTRIES", "256"))
+CACHE_TTL_SECONDS = float(os.environ.get("REVIEWER_CACHE_TTL", str(7 * 24 * 3600)))
+
+
+def sha256_file(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sha256_source(source) -> str:
+    """SHA-256 of a PDF given as a path or as bytes."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(source).hexdigest()
+    return sha256_file(source)
+
+
+def review_cache_key(pdf_sha256: str, model: str, rewrite: bool, pipeline_version: str,
+                     options: Optional[dict] = None) -> str:
+    """
+    Content address of a review: same bytes + same settings -> same result.
+    `options` holds any further settings that change the result.
+    """
+    raw = json.dumps([pdf_sha256, model, bool(rewrite), pipeline_version] + ([options] if options else []),
+                     sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ReviewCache:
+    """
+    Persistent JSON cache in a SQLite file, bounded by entry count (LRU)
+    and by age (TTL). Safe to share between threads; several processes
+    may point at the same file.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_entries: int = CACHE_MAX_ENTRIES,
+                 ttl_seconds: float = CACHE_TTL_SECONDS, filename: str = "reviews.sqlite3"):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, filename)
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " created REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def get_many(self, keys) -> dict:
+        """
+        Batched get(): one transaction for all keys. Returns {key: value}
+        for the live entries only.
+        """
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        found = {}
+        with self._lock:
+            for offset in range(0, len(keys), 500):
+                part = keys[offset:offset + 500]
+                marks = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, value, created FROM entries WHERE key IN ({marks})", part).fetchall()
+                for key, value, created in rows:
+                    if now - created <= self.ttl_seconds:
+                        found[key] = value
+            missing = len(keys) - len(found)
+            self._conn.executemany("UPDATE entries SET last_access = ? WHERE key = ?",
+                                   [(now, k) for k in found])
+            self._conn.commit()
+            self.hits += len(found)
+            self.misses += missing
+        return {k: json.loads(v) for k, v in found.items()}
+
+    def put_many(self, items: dict):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, created, last_access) VALUES (?, ?, ?, ?)",
+                [(k, json.dumps(v), now, now) for k, v in items.items()],
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def put(self, key: str, value: dict):
+        now = time.time()
+        payload = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, created, last_access) VALUES (?, ?, ?, ?)",
+                (key, payload, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        # Expired first, then least recently used beyond the size bound
+        cur = self._conn.execute("DELETE FROM entries WHERE created < ?", (now - self.ttl_seconds,))
+        self.evictions += max(cur.rowcount, 0)
+        count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            cur = self._conn.execute(
+                "DELETE FROM entries WHERE key IN "
+                "(SELECT key FROM entries ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+            self.evictions += max(cur.rowcount, 0)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -1,17 +1,60 @@
-import fitz  # PyMuPDF
+import bisect
+import os
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import spacy
-import requests
 import json
-from typing import List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 # local plagiarism integration (your file)
 from online_plagiarism import check_plagiarism_smallseotools
+from lexicon_matcher import LexiconMatcher, LexiconMatch
+from pdf_extraction import PdfSource, extract_text_from_pdf, iter_pages, load_pdf_source
+from review_cache import ReviewCache, review_cache_key, sha256_source
+from pipeline_dag import Stage, run_dag
+import executors
+import llm_client
+import metrics
+
+# Bump whenever a change alters review output, so cached reviews are not reused
+PIPELINE_VERSION = "2.7"
 
 # -----------------------
 # Load spaCy model once
 # -----------------------
-nlp = spacy.load("en_core_web_sm")
+# "sentences" keeps only sentence segmentation (senter, or parser as a fallback);
+# "full" loads every component like before.
+SPACY_MODEL = "en_core_web_sm"
+SPACY_PIPELINE_MODE = os.environ.get("REVIEWER_SPACY_PIPELINE", "sentences")
+SENTENCE_ONLY_EXCLUDE = ["tagger", "attribute_ruler", "lemmatizer", "ner"]
+
+def load_nlp(mode: str = SPACY_PIPELINE_MODE):
+    """
+    Loads the spaCy pipeline. In "sentences" mode everything but sentence
+    boundary detection is excluded, which is all preprocess_and_tokenize needs.
+    """
+    if mode == "full":
+        return spacy.load(SPACY_MODEL)
+
+    try:
+        model = spacy.load(SPACY_MODEL, exclude=SENTENCE_ONLY_EXCLUDE + ["parser"])
+        if "senter" not in model.component_names:
+            raise ValueError("no senter component")
+        model.enable_pipe("senter")
+    except ValueError:
+        # Older packages ship without senter -> keep the parser for boundaries
+        model = spacy.load(SPACY_MODEL, exclude=SENTENCE_ONLY_EXCLUDE)
+
+    # Drop the shared tok2vec if nothing left in the pipeline listens to it
+    if "tok2vec" in model.pipe_names and not getattr(model.get_pipe("tok2vec"), "listening_components", True):
+        model.disable_pipe("tok2vec")
+    return model
+
+nlp = load_nlp()
+# spaCy pipelines are not documented as thread-safe; serialize use within a process
+_nlp_lock = threading.Lock()
 
 # ==========================================
 # 🟢 v1 FEATURES: Pattern Matching & Basic Scoring
@@ -39,73 +82,226 @@ IMPROVEMENT_PATTERNS = [
     "future extension", "should be explored"
 ]
 
-# -----------------------
-# PDF → Text
-# -----------------------
-def extract_text_from_pdf(pdf_path: str) -> str:
-    text = ""
-    doc = fitz.open(pdf_path)
-    for page in doc:
-        text += page.get_text()
-    return text
+# Dict order is the classification priority: strength > weakness > improvement
+def compile_lexicon() -> LexiconMatcher:
+    """
+    Builds the matcher from the current pattern lists.
+    Call again after editing the lists at runtime.
+    """
+    return LexiconMatcher({
+        "strength": STRENGTH_PATTERNS,
+        "weakness": WEAKNESS_PATTERNS,
+        "improvement": IMPROVEMENT_PATTERNS,
+    })
+
+LEXICON = compile_lexicon()
 
 # -----------------------
 # Section Detection
 # -----------------------
-def detect_sections(text: str) -> dict:
-    sections = {
-        "abstract": "", "introduction": "", "methodology": "",
-        "results": "", "conclusion": ""
-    }
-
-    clean_text = text.lower()
-
-    patterns = {
-        "abstract": r"abstract(.*?)(introduction|1\.)",
-        "introduction": r"(introduction|1\.)(.*?)(methodology|methods|2\.)",
-        "methodology": r"(methodology|methods|2\.)(.*?)(results|3\.)",
-        "results": r"(results|3\.)(.*?)(conclusion|4\.)",
-        "conclusion": r"(conclusion|4\.)(.*)"
-    }
-
-    for section, pattern in patterns.items():
-        match = re.search(pattern, clean_text, re.DOTALL)
-        if match:
-            sections[section] = match.group(0).strip()
+SECTION_NAMES = ["abstract", "introduction", "methodology", "results", "conclusion"]
+
+HEADING_KEYWORDS = {
+    "abstract": "abstract", "introduction": "introduction",
+    "methodology": "methodology", "methods": "methodology",
+    "results": "results", "conclusion": "conclusion", "conclusions": "conclusion",
+}
+
+# Fallback for papers with custom titles ("2. Our Approach")
+NUMBERED_SECTIONS = {"1": "introduction", "2": "methodology", "3": "results", "4": "conclusion",
+                     "I": "introduction", "II": "methodology", "III": "results", "IV": "conclusion"}
+
+# One pass over the text. Every alternative is anchored at a line start and
+# cannot run past the end of the line, so the scan stays linear. Matches are
+# only candidates: _is_heading() then checks the line really looks like one.
+HEADING_RE = re.compile(r"""
+    ^[ \t]*
+    (?:(?P<num>\d{1,2}|[IVX]{1,4})(?P<sub>(?:\.\d+)+)?\.?[ \t]+)?
+    (?:
+        (?:[A-Za-z&]+[ \t]+){0,3}?
+        (?P<kw>(?i:abstract|introduction|methodology|methods|results|conclusions?))
+        [ \t]*[:.]?[ \t]*$
+      | (?P<inline>(?i:abstract))[ \t]*[:.\u2014\u2013-]
+      | (?P<stop>(?i:references|bibliography|acknowledge?ments?|appendix(?:[ \t]+[A-Z0-9]{1,2})?))
+        [ \t]*[:.]?[ \t]*$
+      | (?P<title>[A-Z][A-Za-z\-]*(?:[ \t]+(?:[A-Z][A-Za-z\-]*|and|of|for|the|in|on|&)){0,7})[ \t]*$
+    )
+""", re.MULTILINE | re.VERBOSE)
+
+# A heading line is at most this long; the line before it is blank, ends a
+# sentence, or is at most SHORT_LINE_CHARS (end of a paragraph, title block)
+HEADING_MAX_CHARS = 80
+SHORT_LINE_CHARS = 50
+# Lowercase words a Title-Case heading may contain ("Results and Discussion")
+TITLE_SMALL_WORDS = {"a", "an", "and", "as", "at", "by", "for", "from", "in", "of", "on", "or", "the", "to", "vs", "with"}
+
+def _follows_break(text: str, line_start: int) -> bool:
+    """Whether the line before `line_start` ends a block (so a heading may start here)."""
+    if line_start == 0:
+        return True
+    prev = text[text.rfind("\n", 0, line_start - 1) + 1:line_start - 1].strip()
+    return not prev or len(prev) <= SHORT_LINE_CHARS or prev[-1] in ".!?:"
+
+def _continues_sentence(text: str, line_end: int) -> bool:
+    """Whether the next non-blank line starts lowercase, i.e. this line was wrapped mid-sentence."""
+    rest = text[line_end:line_end + 200].lstrip()
+    return rest[:1].islower()
+
+def _is_heading(m: "re.Match", text: str) -> bool:
+    """
+    Heading shape and context for a HEADING_RE match, so wrapped body lines
+    such as "the experimental results." or "appendix A lists ..." are not
+    taken for headings: capitalised, short, Title-Case unless numbered, no
+    trailing sentence punctuation on multi-word lines, following a break and,
+    unless numbered, not followed by a lowercase continuation line.
+    """
+    if not _follows_break(text, m.start()):
+        return False
+    if not m.group("num") and not m.group("inline") and _continues_sentence(text, m.end()):
+        return False
+    line = m.group(0).strip()
+    prefix_end = m.end("sub") if m.group("sub") else m.end("num")
+    body = text[prefix_end:m.end()].lstrip(". \t").rstrip() if m.group("num") else line
+    if not body[:1].isupper():
+        return False
+    if m.group("inline"):
+        # "Abstract — We propose ..." runs on into the paragraph, so no length or case rules
+        return True
+    if len(line) > HEADING_MAX_CHARS:
+        return False
+    words = body.rstrip(":.").split()
+    if len(words) > 1:
+        if body[-1] in ".!?,;":
+            return False
+        if not m.group("num") and any(w[:1].islower() and w.lower() not in TITLE_SMALL_WORDS for w in words):
+            return False
+    return True
+
+def _scan_headings(text: str) -> List[Tuple[int, Optional[str], bool, bool]]:
+    """
+    Returns (offset, section_name or None, matched_by_number, has_number)
+    for every heading. Unnamed headings still act as section boundaries.
+    """
+    headings = []
+    for m in HEADING_RE.finditer(text):
+        if not _is_heading(m, text):
+            continue
+        if m.group("kw") or m.group("inline"):
+            name = HEADING_KEYWORDS[(m.group("kw") or m.group("inline")).lower()]
+            headings.append((m.start(), name, False, bool(m.group("num"))))
+        elif m.group("stop"):
+            headings.append((m.start(), None, False, False))
+        elif m.group("num") and not m.group("sub"):
+            # Numbered title line: top-level headings only, never "2.1 Setup"
+            headings.append((m.start(), NUMBERED_SECTIONS.get(m.group("num")), True, True))
+    return headings
+
+def index_sections(text: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Maps each detected section to a (start, end) span over `text`.
+    Spans never overlap and each section appears at most once: a section
+    starts at its first heading and ends at the next candidate heading.
+    """
+    headings = _scan_headings(text)
+
+    starts = {}
+    # Numbered keyword headings ("5 Results") win over bare ones, which could
+    # be a capitalised word on a line of its own; number-only headings come last
+    for by_number, with_number in ((False, True), (False, False), (True, True)):
+        for offset, name, numbered, has_number in headings:
+            if (name and numbered == by_number and has_number == with_number
+                    and name not in starts and offset not in starts.values()):
+                starts[name] = offset
+
+    boundaries = sorted({offset for offset, _, _, _ in headings})
+    spans = {}
+    for name, start in starts.items():
+        idx = bisect.bisect_right(boundaries, start)
+        end = boundaries[idx] if idx < len(boundaries) else len(text)
+        spans[name] = (start, end)
+    return spans
 
+def detect_sections(text: str) -> dict:
+    sections = {name: "" for name in SECTION_NAMES}
+    for name, (start, end) in index_sections(text).items():
+        sections[name] = text[start:end].strip()
     return sections
 
 # -----------------------
 # Sentence Preprocessing
 # -----------------------
-def preprocess_and_tokenize(section_text: str) -> List[str]:
-    if not section_text:
-        return []
+def _split_for_nlp(text: str, limit: int) -> List[str]:
+    """
+    Cuts text into pieces shorter than `limit` characters, preferring
+    paragraph and line breaks so sentences are not split in half.
+    """
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind("\n\n", 0, limit)
+        if cut <= 0:
+            cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = text.rfind(" ", 0, limit)
+        if cut <= 0:
+            cut = limit
+        chunks.append(text[:cut])
+        text = text[cut:]
+    chunks.append(text)
+    return chunks
+
+def preprocess_section_batches(section_dicts: List[Dict[str, str]], batch_size: int = 8,
+                               n_process: int = 1) -> List[Dict[str, List[str]]]:
+    """
+    Sentence-splits the sections of several papers in a single nlp.pipe call.
+    n_process > 1 lets spaCy fan the work out over worker processes.
+    Texts longer than nlp.max_length are chunked instead of raising.
+    """
+    results = [{name: [] for name in sections} for sections in section_dicts]
+    limit = max(1, nlp.max_length - 1)
 
-    doc = nlp(section_text)
-    sentences = []
+    jobs = []
+    for idx, sections in enumerate(section_dicts):
+        for name, section_text in sections.items():
+            if section_text:
+                jobs.extend((chunk, (idx, name)) for chunk in _split_for_nlp(section_text, limit))
 
-    for sent in doc.sents:
-        clean_sent = sent.text.strip()
-        if len(clean_sent) > 15:
-            sentences.append(clean_sent)
+    with _nlp_lock:
+        for doc, (idx, name) in nlp.pipe(jobs, as_tuples=True, batch_size=batch_size, n_process=n_process):
+            for sent in doc.sents:
+                clean_sent = sent.text.strip()
+                if len(clean_sent) > 15:
+                    results[idx][name].append(clean_sent)
+
+    return results
+
+def preprocess_sections(sections: Dict[str, str], batch_size: int = 8) -> Dict[str, List[str]]:
+    """
+    Sentence-splits every section of one paper in a single batched nlp.pipe call.
+    """
+    return preprocess_section_batches([sections], batch_size=batch_size)[0]
 
-    return sentences
+def preprocess_and_tokenize(section_text: str) -> List[str]:
+    if not section_text:
+        return []
+    return preprocess_sections({"text": section_text})["text"]
 
 # -----------------------
 # Sentence Classification
 # -----------------------
+def match_sentence(sent: str) -> Optional[LexiconMatch]:
+    """
+    Returns the winning (category, pattern, offset) hit for a sentence, or None.
+    """
+    return LEXICON.classify(sent)
+
 def classify_sentences(sentences: List[str]) -> Tuple[List[str], List[str], List[str]]:
     strengths, weaknesses, improvements = [],[],[]
-    
+    buckets = {"strength": strengths, "weakness": weaknesses, "improvement": improvements}
+
     for sent in sentences:
-        sent_lower = sent.lower()
-        if any(pat in sent_lower for pat in STRENGTH_PATTERNS):
-            strengths.append(sent)
-        elif any(pat in sent_lower for pat in WEAKNESS_PATTERNS):
-            weaknesses.append(sent)
-        elif any(pat in sent_lower for pat in IMPROVEMENT_PATTERNS):
-            improvements.append(sent)
+        hit = LEXICON.classify(sent)
+        if hit:
+            buckets[hit.category].append(sent)
 
     return strengths, weaknesses, improvements
 
@@ -142,11 +338,21 @@ Be strict, fair, and constructive.
 You must output your response in valid JSON format only.
 """
 
+# Sections shorter than this are not sent to the LLM
+MIN_REVIEW_CHARS = 50
+
+def _json_reply_with(*keys):
+    """validate= for llm_client.generate: the reply is a non-empty JSON object with `keys`."""
+    def check(data: dict) -> bool:
+        parsed = json.loads(data["response"])
+        return isinstance(parsed, dict) and bool(parsed) and all(key in parsed for key in keys)
+    return check
+
 def analyze_section_with_llm(section_name: str, section_text: str, model: str):
     """
     Asks Ollama to score and critique a specific section.
     """
-    if not section_text or len(section_text) < 50:
+    if not section_text or len(section_text) < MIN_REVIEW_CHARS:
         return None
 
     user_prompt = f"""
@@ -179,16 +385,17 @@ def analyze_section_with_llm(section_name: str, section_text: str, model: str):
     
     try:
         # Increased timeout for deep analysis
-        resp = requests.post("http://localhost:11434/api/generate", json=payload, timeout=60)
-        data = resp.json()
+        data = llm_client.generate(payload, call_site="section_review", timeout=60,
+                                   validate=_json_reply_with("score"))
         return json.loads(data["response"])
     except Exception as e:
         print(f"❌ AI Analysis failed for {section_name}: {e}")
         return None
 
-def generate_overall_critique(paper_summary_text: str, model: str):
+def generate_overall_critique(paper_summary_text: str, model: str, on_token=None):
     """
     Generates the final 'NeurIPS-style' scorecard.
+    `on_token(text)` receives the raw JSON tokens as they stream in.
     """
     user_prompt = f"""
     Based on the abstract and conclusion below, generate a final review scorecard.
@@ -216,8 +423,8 @@ def generate_overall_critique(paper_summary_text: str, model: str):
         "format": "json", "temperature": 0.2
     }
     try:
-        resp = requests.post("http://localhost:11434/api/generate", json=payload, timeout=60)
-        data = resp.json()
+        data = llm_client.generate(payload, call_site="scorecard", timeout=60, on_token=on_token,
+                                   validate=_json_reply_with())
         return json.loads(data["response"])
     except:
         return {}
@@ -225,9 +432,11 @@ def generate_overall_critique(paper_summary_text: str, model: str):
 # -----------------------
 # Helper: Strict Rewriting (v1 Fixed)
 # -----------------------
-def rewrite_with_ollama(text: str, model: str = "llama3.1:8b", timeout: int = 60) -> str:
+def rewrite_with_ollama(text: str, model: str = "llama3.1:8b", timeout: int = 60, on_token=None,
+                        on_error=None) -> str:
     """
     Sends a single rewrite job to local Ollama and returns the rewritten text.
+    On failure the input comes back unchanged and on_error(exc) is called.
     """
     try:
         prompt = (
@@ -245,21 +454,90 @@ def rewrite_with_ollama(text: str, model: str = "llama3.1:8b", timeout: int = 60
             "max_tokens": 256, "temperature": 0.1, "stop": ["Input:", "\n\n"]
         }
 
-        resp = requests.post("http://localhost:11434/api/generate", json=payload, timeout=timeout)
-        if resp.status_code != 200: return text
+        data = llm_client.generate(payload, call_site="rewrite", timeout=timeout, on_token=on_token,
+                                   validate=lambda d: bool(_clean_rewrite(d.get("response", ""))))
 
-        out = resp.json().get("response", "").strip()
-        if out.startswith('"') and out.endswith('"'): out = out[1:-1]
-        if ":" in out[:20]: out = out.split(":", 1)[1].strip()
-        
+        out = _clean_rewrite(data.get("response", ""))
         return out if out else text
 
     except Exception as e:
         print(f"Error calling Ollama: {e}")
+        if on_error:
+            on_error(e)
         return text
 
-def rewrite_texts_with_ollama(texts: List[str], model: str = "llama3.1:8b") -> List[str]:
-    return [rewrite_with_ollama(t, model=model) for t in texts]
+def _clean_rewrite(out: str) -> str:
+    out = out.strip()
+    if out.startswith('"') and out.endswith('"'): out = out[1:-1]
+    if ":" in out[:20]: out = out.split(":", 1)[1].strip()
+    return out
+
+# Sentences per batched rewrite request (1 = old one-request-per-sentence loop)
+REWRITE_BATCH_SIZE = int(os.environ.get("REVIEWER_REWRITE_BATCH_SIZE", "8"))
+
+def rewrite_batch_with_ollama(texts: List[str], model: str = "llama3.1:8b", timeout: int = 120,
+                              on_token=None) -> List[Optional[str]]:
+    """
+    Rewrites several sentences in one JSON-mode request.
+    Returns a list aligned with `texts`; items the model dropped, merged or
+    mangled are None so the caller can retry them one by one.
+    """
+    items = [{"id": idx, "text": t} for idx, t in enumerate(texts)]
+    prompt = (
+        "You are a strict academic editor. Rewrite EACH input sentence below into "
+        "concise, objective, and professional academic English.\n\n"
+        "STRICT RULES:\n"
+        "1. Rewrite every item separately. Never merge or split items.\n"
+        "2. Keep each item's id.\n"
+        "3. Do NOT use conversational fillers.\n"
+        "4. Avoid first-person pronouns (like 'we', 'our').\n\n"
+        f"Input (JSON): {json.dumps(items, ensure_ascii=False)}\n\n"
+        'Output Format (JSON ONLY): {"rewrites": [{"id": 0, "text": "..."}, ...]}'
+    )
+    payload = {
+        "model": model, "prompt": prompt, "stream": False,
+        "format": "json", "temperature": 0.1
+    }
+
+    results: List[Optional[str]] = [None] * len(texts)
+    try:
+        data = llm_client.generate(payload, call_site="rewrite_batch", timeout=timeout, on_token=on_token,
+                                   validate=_json_reply_with("rewrites"))
+        rewrites = json.loads(data["response"]).get("rewrites", [])
+    except Exception as e:
+        print(f"Batch rewrite failed, falling back to single rewrites: {e}")
+        return results
+
+    for item in rewrites:
+        if not isinstance(item, dict):
+            continue
+        idx, out = item.get("id"), item.get("text")
+        if not isinstance(idx, int) or not 0 <= idx < len(texts) or not isinstance(out, str):
+            continue
+        out = _clean_rewrite(out)
+        # A rewrite far longer than its input has most likely swallowed a neighbour
+        if out and len(out) <= 3 * len(texts[idx]) + 40:
+            results[idx] = out
+    return results
+
+def rewrite_texts_with_ollama(texts: List[str], model: str = "llama3.1:8b",
+                              batch_size: int = REWRITE_BATCH_SIZE, single_rewriter=None,
+                              on_token=None) -> List[str]:
+    """
+    Rewrites `texts` in batches of `batch_size`; only items missing from a
+    batch response go through the per-sentence `single_rewriter`.
+    `on_token` streams the batch responses (not custom single rewriters).
+    """
+    single = single_rewriter or (lambda t: rewrite_with_ollama(t, model=model, on_token=on_token))
+    if batch_size <= 1:
+        return [single(t) for t in texts]
+
+    out = []
+    for start in range(0, len(texts), batch_size):
+        chunk = texts[start:start + batch_size]
+        batch = rewrite_batch_with_ollama(chunk, model=model, on_token=on_token) if len(chunk) > 1 else [None]
+        out.extend(r if r is not None else single(t) for t, r in zip(chunk, batch))
+    return out
 
 
 # -----------------------
@@ -304,108 +582,383 @@ def generate_final_report(strengths, weaknesses, improvements, verdict, confiden
 # ==========================================
 # 🚀 MAIN PIPELINE ENTRYPOINT
 # ==========================================
-def review_pdf(pdf_path: str, rewrite: bool = True, ollama_model: str = "llama3.1:8b") -> dict:
-    """
-    Main function. Runs v1 Heuristics AND v2 LLM Analysis.
-    """
-    
-    # 1. Extract text & Sections
-    text = extract_text_from_pdf(pdf_path)
-    sections = detect_sections(text)
-
-    # --- PHASE 1: v1 Heuristics (Fast) ---
-    abstract_sents = preprocess_and_tokenize(sections.get("abstract", ""))
-    intro_sents = preprocess_and_tokenize(sections.get("introduction", ""))
-    method_sents = preprocess_and_tokenize(sections.get("methodology", ""))
-    result_sents = preprocess_and_tokenize(sections.get("results", ""))
-    conclusion_sents = preprocess_and_tokenize(sections.get("conclusion", ""))
-
+def _score_heuristics(section_sents: Dict[str, List[str]]) -> dict:
     all_strengths, all_weaknesses, all_improvements = [], [], []
-    for section in [abstract_sents, intro_sents, method_sents, result_sents, conclusion_sents]:
-        s, w, i = classify_sentences(section)
+    for name in SECTION_NAMES:
+        s, w, i = classify_sentences(section_sents.get(name, []))
         all_strengths.extend(s)
         all_weaknesses.extend(w)
         all_improvements.extend(i)
 
     # v1 Scoring
     final_score, confidence = compute_final_score(all_strengths, all_weaknesses, all_improvements)
-    verdict = generate_verdict(confidence)
+    return {
+        "strengths": all_strengths, "weaknesses": all_weaknesses, "improvements": all_improvements,
+        "final_score": final_score, "confidence": confidence, "verdict": generate_verdict(confidence),
+    }
 
-    # Plagiarism Check
+def run_heuristic_phase(pdf_path: PdfSource, parallel_extract: bool = False) -> dict:
+    """
+    Extraction, section detection, sentence splitting, classification and
+    v1 scoring. No I/O besides reading the PDF and a picklable result, so it
+    can run in a worker process.
+    """
+    text = extract_text_from_pdf(pdf_path, parallel=parallel_extract)
+    sections = detect_sections(text)
+    return {"text": text, "sections": sections, **_score_heuristics(preprocess_sections(sections))}
+
+def run_heuristic_phase_batch(texts: List[str], n_process: int = 1) -> List[dict]:
+    """
+    run_heuristic_phase for several already-extracted papers, with all of
+    their sections going through one nlp.pipe call.
+    """
+    all_sections = [detect_sections(text) for text in texts]
+    all_sents = preprocess_section_batches(all_sections, n_process=n_process)
+    return [{"text": text, "sections": sections, **_score_heuristics(sents)}
+            for text, sections, sents in zip(texts, all_sections, all_sents)]
+
+def run_scoring_phase(sections: Dict[str, str]) -> dict:
+    """Sentence splitting, classification and v1 scoring of detected sections."""
+    t0 = time.perf_counter()
+    section_sents = preprocess_sections(sections)
+    t1 = time.perf_counter()
+    scored = _score_heuristics(section_sents)
+    return dict(scored, _steps={"spacy": t1 - t0, "classification": time.perf_counter() - t1})
+
+# Pipeline stages in execution order, and what each one needs run first
+STAGES = ("extract", "heuristics", "plagiarism", "section_review", "scorecard", "rewrite", "report")
+STAGE_DEPENDS = {
+    "extract": (),
+    "heuristics": ("extract",),
+    "plagiarism": (),
+    "section_review": ("extract",),
+    "scorecard": ("extract",),
+    "rewrite": ("heuristics",),
+    "report": ("heuristics",),
+}
+# How many strengths / weaknesses / improvements the rewrite stage polishes by default
+REWRITE_TOP_N = 3
+
+def resolve_stages(stages: Optional[Iterable[str]] = None, rewrite: bool = True) -> Tuple[str, ...]:
+    """
+    The stages to run, in order: `stages` (all by default) plus everything
+    they depend on, directly or not; "extract" is always included.
+    rewrite=False always drops the rewrite stage. Raises ValueError for
+    unknown stages and for a selection that leaves nothing to run.
+    """
+    wanted = set(STAGES if stages is None else stages)
+    unknown = wanted - set(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(sorted(unknown))}. Valid: {', '.join(STAGES)}")
+    if not rewrite:
+        wanted.discard("rewrite")
+    if not wanted:
+        raise ValueError(f"No stages to run; select at least one of: {', '.join(STAGES)}")
+    todo = list(wanted | {"extract"})
+    while todo:
+        stage = todo.pop()
+        wanted.add(stage)
+        todo.extend(dep for dep in STAGE_DEPENDS[stage] if dep not in wanted)
+    return tuple(stage for stage in STAGES if stage in wanted)
+
+def parse_stages(value: Optional[str]) -> Optional[List[str]]:
+    """Comma-separated stage list from a form field; empty means all stages."""
+    stages = [part.strip() for part in (value or "").split(",") if part.strip()]
+    return stages or None
+
+def run_extract_phase(pdf_path: PdfSource, parallel_extract: bool = False) -> dict:
+    t0 = time.perf_counter()
+    text = extract_text_from_pdf(pdf_path, parallel=parallel_extract)
+    t1 = time.perf_counter()
+    sections = detect_sections(text)
+    return {"text": text, "sections": sections,
+            "_steps": {"pdf_extraction": t1 - t0, "section_detection": time.perf_counter() - t1}}
+
+# What each stage leaves behind when it is skipped
+STAGE_DEFAULTS = {
+    "heuristics": {"strengths": [], "weaknesses": [], "improvements": [],
+                   "final_score": 0.0, "confidence": 0.0, "verdict": "UNKNOWN"},
+    "plagiarism": {"plagiarism_percent": 0, "originality_percent": 100, "plagiarism_risk": "SKIPPED",
+                   "plagiarism_sources": [], "plagiarism_lookup": {}},
+    "section_review": {"methodology_review": None, "results_review": None},
+    "scorecard": {"final_card": {}},
+    "rewrite": {"rewritten_strengths": [], "rewritten_weaknesses": [], "rewritten_improvements": []},
+    "report": {"report": ""},
+}
+
+def _final_verdict(verdict: str, plagiarism_percent) -> str:
+    if isinstance(plagiarism_percent, (int, float)) and plagiarism_percent > 40:
+        return "❌ REJECT (PLAGIARISM)"
+    return verdict
+
+def _merge_card(final_card: dict, method_review, results_review) -> dict:
+    card = dict(final_card)
+    if method_review and "score" in method_review:
+        card["methodology"] = method_review["score"]
+    if results_review and "score" in results_review:
+        # We can also add a 'Results' field to the card if you want
+        card["results_score"] = results_review["score"]
+    return card
+
+class _PageTexts:
+    """The PDF's page texts, read lazily; iterating again re-reads the pages."""
+    def __init__(self, pdf_path: PdfSource):
+        self.pdf_path = pdf_path
+
+    def __iter__(self):
+        return (text for _, text in iter_pages(self.pdf_path))
+
+def _plagiarism_stage(pdf_path: PdfSource) -> dict:
+    # Sentences are sampled page by page as they are read, so the check
+    # starts right away instead of waiting for the extract stage
+    lookup = {}
     try:
-        plagiarism_percent, originality_percent, plagiarism_risk = check_plagiarism_smallseotools(text)
+        plagiarism_percent, originality_percent, plagiarism_risk, plagiarism_sources = \
+            check_plagiarism_smallseotools(_PageTexts(pdf_path), stats=lookup)
         try: plagiarism_percent = int(plagiarism_percent)
         except: plagiarism_percent = 0
         try: originality_percent = int(originality_percent)
         except: originality_percent = max(0, 100 - plagiarism_percent)
     except:
-        plagiarism_percent, originality_percent, plagiarism_risk = 0, 100, "UNAVAILABLE"
-
-    if isinstance(plagiarism_percent, (int, float)) and plagiarism_percent > 40:
-        verdict = "❌ REJECT (PLAGIARISM)"
-
-    # --- PHASE 2: v2 Deep AI Analysis (The "Brain") ---
-    # We analyze key sections independently
-    print("🤖 Running Expert AI Analysis on Sections...")
-    
-    method_review = analyze_section_with_llm("Methodology", sections.get("methodology", ""), ollama_model)
-    results_review = analyze_section_with_llm("Results", sections.get("results", ""), ollama_model)
-    
-    # Generate Overall Scorecard using Abstract + Conclusion
-    summary_text = (sections.get("abstract", "") + "\n" + sections.get("conclusion", ""))
-    final_card = generate_overall_critique(summary_text, ollama_model)
-    if method_review and "score" in method_review:
-        final_card["methodology"] = method_review["score"]
+        metrics.STAGE_ERRORS.inc(stage="plagiarism")
+        plagiarism_percent, originality_percent, plagiarism_risk, plagiarism_sources = 0, 100, "UNAVAILABLE", []
+    return {"plagiarism_percent": plagiarism_percent, "originality_percent": originality_percent,
+            "plagiarism_risk": plagiarism_risk, "plagiarism_sources": plagiarism_sources,
+            "plagiarism_lookup": lookup}
 
-    if results_review and "score" in results_review:
-        # We can also add a 'Results' field to the card if you want
-        final_card["results_score"] = results_review["score"]
-    # --- PHASE 3: Rewriting (Optional) ---
-    rewritten_strengths = []
-    rewritten_weaknesses = []
-    rewritten_improvements = []
-    
-    if rewrite:
-        # We limit to top 3 to save time
-        if all_strengths:
-            rewritten_strengths = rewrite_texts_with_ollama(all_strengths[:3], model=ollama_model)
-        if all_weaknesses:
-            rewritten_weaknesses = rewrite_texts_with_ollama(all_weaknesses[:3], model=ollama_model)
-        if all_improvements:
-            rewritten_improvements = rewrite_texts_with_ollama(all_improvements[:3], model=ollama_model)
-
-    # Generate Report
-    report = generate_final_report(
-        rewritten_strengths if rewrite else all_strengths,
-        rewritten_weaknesses if rewrite else all_weaknesses,
-        all_improvements, # We usually don't rewrite improvements to save time, but you can add it
-        verdict,
-        confidence,
-        v2_card=final_card
-    )
+def degraded_stages(run: Iterable[str], context: dict) -> List[str]:
+    """
+    Stages whose output is a stand-in for a failed LLM call or web search:
+    a section review missing although the section was long enough, an empty
+    scorecard, or a simulated / unavailable plagiarism check (including a
+    missing search library).
+    """
+    degraded = []
+    sections = context.get("sections") or {}
+    if "section_review" in run and any(
+            context[key] is None and len(sections.get(name) or "") >= MIN_REVIEW_CHARS
+            for key, name in (("methodology_review", "methodology"), ("results_review", "results"))):
+        degraded.append("section_review")
+    if "scorecard" in run and not context["final_card"]:
+        degraded.append("scorecard")
+    if "plagiarism" in run and (context["plagiarism_lookup"].get("method") == "simulation"
+                                or context["plagiarism_risk"] in ("UNAVAILABLE", "MISSING_LIB")):
+        degraded.append("plagiarism")
+    return degraded
+
+def is_cacheable(result: dict) -> bool:
+    """False for reviews that fell back somewhere; those are worth redoing once the service is back."""
+    return not result.get("meta", {}).get("degraded")
+
+def build_stages(run: Iterable[str], ollama_model: str = "llama3.1:8b",
+                 rewrite_limit: Optional[int] = REWRITE_TOP_N, token_sink=None,
+                 on_fallback=None) -> List[Stage]:
+    """
+    The DAG for the selected stages. Inputs of skipped stages come from
+    STAGE_DEFAULTS; token_sink(stage) gives the on_token callback for a
+    streaming LLM stage (or None). on_fallback(stage) is called when a stage
+    had to fall back to a stand-in (see degraded_stages).
+    """
+    sink = token_sink or (lambda stage: None)
+    fallback = on_fallback or (lambda stage: None)
+
+    def section_review(sections):
+        # We analyze key sections independently, so both calls run side by side
+        print("🤖 Running Expert AI Analysis on Sections...")
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            method = pool.submit(analyze_section_with_llm, "Methodology", sections.get("methodology", ""), ollama_model)
+            results = pool.submit(analyze_section_with_llm, "Results", sections.get("results", ""), ollama_model)
+            return {"methodology_review": method.result(), "results_review": results.result()}
+
+    def scorecard(sections):
+        # Generate Overall Scorecard using Abstract + Conclusion
+        summary_text = (sections.get("abstract", "") + "\n" + sections.get("conclusion", ""))
+        return {"final_card": generate_overall_critique(summary_text, ollama_model, on_token=sink("critique"))}
+
+    def rewrite(strengths, weaknesses, improvements):
+        # We limit to the top few to save time, and send all of them in one batch
+        picked = [lst[:rewrite_limit] for lst in (strengths, weaknesses, improvements)]
+        top = picked[0] + picked[1] + picked[2]
+        single = lambda t: rewrite_with_ollama(t, model=ollama_model, on_token=sink("rewrite"),
+                                               on_error=lambda e: fallback("rewrite"))
+        rewritten = rewrite_texts_with_ollama(top, model=ollama_model, single_rewriter=single,
+                                              on_token=sink("rewrite"))
+        n_s, n_w = len(picked[0]), len(picked[1])
+        return {"rewritten_strengths": rewritten[:n_s], "rewritten_weaknesses": rewritten[n_s:n_s + n_w],
+                "rewritten_improvements": rewritten[n_s + n_w:]}
+
+    def report(strengths, weaknesses, improvements, verdict, confidence, plagiarism_percent,
+               final_card, methodology_review, results_review, rewritten_strengths, rewritten_weaknesses):
+        card = _merge_card(final_card, methodology_review, results_review) if "scorecard" in run else final_card
+        return {"report": generate_final_report(
+            rewritten_strengths if "rewrite" in run else strengths,
+            rewritten_weaknesses if "rewrite" in run else weaknesses,
+            improvements,  # We usually don't rewrite improvements to save time, but you can add it
+            _final_verdict(verdict, plagiarism_percent),
+            confidence,
+            v2_card=card
+        )}
+
+    heuristic_keys = tuple(STAGE_DEFAULTS["heuristics"])
+    all_stages = [
+        Stage("extract", run_extract_phase, ("pdf_path", "parallel_extract"), ("text", "sections"), kind="cpu"),
+        Stage("heuristics", run_scoring_phase, ("sections",), heuristic_keys, kind="cpu"),
+        Stage("plagiarism", _plagiarism_stage, ("pdf_path",), tuple(STAGE_DEFAULTS["plagiarism"])),
+        Stage("section_review", section_review, ("sections",), tuple(STAGE_DEFAULTS["section_review"])),
+        Stage("scorecard", scorecard, ("sections",), ("final_card",)),
+        Stage("rewrite", rewrite, ("strengths", "weaknesses", "improvements"), tuple(STAGE_DEFAULTS["rewrite"])),
+        Stage("report", report,
+              ("strengths", "weaknesses", "improvements", "verdict", "confidence", "plagiarism_percent",
+               "final_card", "methodology_review", "results_review", "rewritten_strengths", "rewritten_weaknesses"),
+              ("report",)),
+    ]
+    return [stage for stage in all_stages if stage.name in run]
+
+def review_pdf(pdf_path: PdfSource, rewrite: bool = True, ollama_model: str = "llama3.1:8b",
+               parallel_extract: bool = False, on_event=None, cpu_pool=None,
+               heuristics: Optional[dict] = None, stages: Optional[Iterable[str]] = None,
+               rewrite_limit: Optional[int] = REWRITE_TOP_N) -> dict:
+    """
+    Main function. Runs v1 Heuristics AND v2 LLM Analysis.
+    pdf_path may also be the PDF's bytes or a binary buffer (no temp file needed).
+    stages selects what to run (see STAGES; dependencies are added); the
+    result always has the same keys, with neutral values for skipped stages,
+    and lists the stages that ran under "stages".
+    The stages run as a DAG (see build_stages): the plagiarism check reads the
+    pages alongside extraction; section review, scorecard and the heuristic
+    pass run side by side once text is extracted.
+    result["meta"] has per-stage wall/CPU seconds, the critical path and
+    "degraded", the stages that fell back (see degraded_stages).
+    rewrite_limit caps how many items per list are rewritten (None = all).
+    parallel_extract=True uses a process pool for PDFs above PARALLEL_MIN_PAGES.
+    cpu_pool (an Executor) runs the CPU-bound stages off the calling thread.
+    on_event(event, data) is called with "stage" events as each stage finishes
+    and "token" events while the critique and rewrite LLM calls stream.
+    heuristics, a run_heuristic_phase result computed elsewhere (e.g. for a
+    whole batch at once), skips extraction and the v1 phase.
+    """
+    emit = on_event or (lambda event, data: None)
+    run = resolve_stages(stages, rewrite)
+
+    def token_sink(stage):
+        # Only stream LLM output when someone is listening
+        return (lambda text: emit("token", {"stage": stage, "text": text})) if on_event else None
+
+    def on_done(stage, out):
+        if stage == "extract":
+            emit("stage", {"stage": "extract", "chars": len(out["text"])})
+            emit("stage", {"stage": "sections", "found": [k for k, v in out["sections"].items() if v]})
+        elif stage == "heuristics":
+            emit("stage", {"stage": "heuristics", "strengths": len(out["strengths"]),
+                           "weaknesses": len(out["weaknesses"]), "improvements": len(out["improvements"])})
+        elif stage == "plagiarism":
+            emit("stage", {"stage": "plagiarism", "plagiarism_percent": out["plagiarism_percent"]})
+        elif stage == "rewrite":
+            emit("stage", {"stage": "rewrite", "count": sum(len(v) for v in out.values())})
+        else:
+            emit("stage", {"stage": stage})
+
+    context = {}
+    for stage, defaults in STAGE_DEFAULTS.items():
+        if stage not in run:
+            context.update(defaults)
+    fallbacks = set()
+    dag = build_stages(run, ollama_model, rewrite_limit, token_sink, on_fallback=fallbacks.add)
+    if heuristics is not None:
+        # Extraction and the v1 phase already ran (e.g. batched across papers)
+        done = {"extract", "heuristics"}
+        context.update({key: heuristics[key] for stage in dag if stage.name in done for key in stage.outputs})
+        for stage in dag:
+            if stage.name in done:
+                on_done(stage.name, heuristics)
+        dag = [stage for stage in dag if stage.name not in done]
+    context.update({"pdf_path": load_pdf_source(pdf_path), "parallel_extract": parallel_extract})
+
+    context, meta = run_dag(dag, context, cpu_pool=cpu_pool, on_done=on_done,
+                            on_error=lambda stage, e: metrics.STAGE_ERRORS.inc(stage=stage),
+                            replace_cpu_pool=executors.replace_cpu_pool)
+    metrics.observe_review(meta)
+    meta["degraded"] = sorted(set(degraded_stages(run, context)) | fallbacks)
+
+    final_card = context["final_card"]
+    if "scorecard" in run:
+        final_card = _merge_card(final_card, context["methodology_review"], context["results_review"])
 
     return {
         # v1 Data
-        "strengths": all_strengths,
-        "weaknesses": all_weaknesses,
-        "improvements": all_improvements,
-        "rewritten_strengths": rewritten_strengths,
-        "rewritten_weaknesses": rewritten_weaknesses,
-        "rewritten_improvements": rewritten_improvements,
-        "final_score": final_score,
-        "confidence": confidence,
-        "verdict": verdict,
-        "plagiarism_percent": plagiarism_percent,
-        "originality_percent": originality_percent,
-        "plagiarism_risk": plagiarism_risk,
-        "report": report,
-        
+        "strengths": context["strengths"],
+        "weaknesses": context["weaknesses"],
+        "improvements": context["improvements"],
+        "rewritten_strengths": context["rewritten_strengths"],
+        "rewritten_weaknesses": context["rewritten_weaknesses"],
+        "rewritten_improvements": context["rewritten_improvements"],
+        "final_score": context["final_score"],
+        "confidence": context["confidence"],
+        "verdict": _final_verdict(context["verdict"], context["plagiarism_percent"]),
+        "plagiarism_percent": context["plagiarism_percent"],
+        "originality_percent": context["originality_percent"],
+        "plagiarism_risk": context["plagiarism_risk"],
+        "plagiarism_sources": context["plagiarism_sources"],
+        "plagiarism_lookup": context["plagiarism_lookup"],
+        "report": context["report"],
+
         # v2 Data (New!)
-        "methodology_review": method_review,
-        "results_review": results_review,
-        "final_card": final_card
+        "methodology_review": context["methodology_review"],
+        "results_review": context["results_review"],
+        "final_card": final_card,
+
+        # Stage artifacts for callers that build on the review
+        "sections": context["sections"],
+        "stages": list(run),
+        # Per-stage wall/CPU seconds and the critical path (see pipeline_dag.run_dag)
+        "meta": meta,
     }
 
+# -----------------------
+# Cached entrypoint
+# -----------------------
+_review_cache = None
+
+def get_review_cache() -> ReviewCache:
+    global _review_cache
+    if _review_cache is None:
+        _review_cache = ReviewCache()
+    return _review_cache
+
+def review_key(pdf_sha256: str, ollama_model: str = "llama3.1:8b", rewrite: bool = True,
+               stages: Optional[Iterable[str]] = None, rewrite_limit: Optional[int] = REWRITE_TOP_N) -> str:
+    """Review cache key; reviews with different stage selections never share an entry."""
+    options = {"stages": list(resolve_stages(stages, rewrite)), "rewrite_limit": rewrite_limit}
+    return review_cache_key(pdf_sha256, ollama_model, rewrite, PIPELINE_VERSION, options=options)
+
+def review_pdf_cached(pdf_path: PdfSource, rewrite: bool = True, ollama_model: str = "llama3.1:8b",
+                      use_cache: bool = True, parallel_extract: bool = False, on_event=None,
+                      cpu_pool=None, stages: Optional[Iterable[str]] = None,
+                      rewrite_limit: Optional[int] = REWRITE_TOP_N) -> dict:
+    """
+    review_pdf behind the persistent review cache, keyed by the SHA-256 of the
+    PDF bytes, the model, the rewrite flag, the stage selection and PIPELINE_VERSION.
+    use_cache=False bypasses the lookup but still stores the fresh result.
+    Degraded reviews (an LLM stage failed, plagiarism was simulated) are not stored.
+    """
+    cache = get_review_cache()
+    pdf_path = load_pdf_source(pdf_path)
+    key = review_key(sha256_source(pdf_path), ollama_model, rewrite, stages, rewrite_limit)
+
+    if use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            if on_event:
+                on_event("stage", {"stage": "cache", "hit": True})
+            return cached
+
+    result = review_pdf(pdf_path, rewrite=rewrite, ollama_model=ollama_model,
+                        parallel_extract=parallel_extract, on_event=on_event, cpu_pool=cpu_pool,
+                        stages=stages, rewrite_limit=rewrite_limit)
+    if is_cacheable(result):
+        cache.put(key, result)
+    return result
+
 if __name__ == "__main__":
     # Local Test
     res = review_pdf("sample.pdf", rewrite=False)
@@ -0,0 +1,175 @@
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import requests
+
+# -----------------------
+# Web search settings
+# -----------------------
+# "google" (googlesearch-python) or "http" (JSON API at REVIEWER_SEARCH_URL)
+SEARCH_BACKEND = os.environ.get("REVIEWER_SEARCH_BACKEND", "google")
+SEARCH_URL = os.environ.get("REVIEWER_SEARCH_URL", "http://localhost:8765")
+SEARCH_RATE = float(os.environ.get("REVIEWER_SEARCH_RATE", "0.5"))        # queries per second
+SEARCH_BURST = int(os.environ.get("REVIEWER_SEARCH_BURST", "3"))          # bucket capacity
+SEARCH_WORKERS = int(os.environ.get("REVIEWER_SEARCH_WORKERS", "4"))      # queries in flight
+SEARCH_RETRIES = int(os.environ.get("REVIEWER_SEARCH_RETRIES", "4"))      # per query, on 429
+SEARCH_BACKOFF = float(os.environ.get("REVIEWER_SEARCH_BACKOFF", "1.0"))  # first retry delay (s)
+SEARCH_TIMEOUT = float(os.environ.get("REVIEWER_SEARCH_TIMEOUT", "10"))
+
+
+class RateLimited(Exception):
+    """The provider answered 429; `retry_after` is its hint in seconds, if any."""
+
+    def __init__(self, retry_after: Optional[float] = None):
+        super().__init__(f"rate limited (retry after {retry_after}s)" if retry_after else "rate limited")
+        self.retry_after = retry_after
+
+
+def _retry_after(headers) -> Optional[float]:
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+# -----------------------
+# Backends
+# -----------------------
+class SearchBackend(ABC):
+    """
+    One exact-phrase web search. `search` returns the URL of the first hit
+    or None, and raises RateLimited on a 429.
+    """
+    name = "base"
+
+    @abstractmethod
+    def search(self, sentence: str) -> Optional[str]:
+        ...
+
+
+class GoogleSearchBackend(SearchBackend):
+    name = "google"
+
+    def __init__(self, search_fn):
+        self._search = search_fn
+
+    def search(self, sentence: str) -> Optional[str]:
+        try:
+            results = list(self._search(f'"{sentence}"', num_results=1, advanced=True))
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 429:
+                raise RateLimited(_retry_after(e.response.headers))
+            raise
+        return results[0].url if results else None
+
+
+class HttpSearchBackend(SearchBackend):
+    """
+    Generic JSON search API: GET {base_url}/search?q=... ->
+    {"results": [{"url": ...}, ...]}. benchmarks/fake_search_server.py
+    implements it for local runs.
+    """
+    name = "http"
+
+    def __init__(self, base_url: Optional[str] = None, timeout: float = SEARCH_TIMEOUT):
+        self.base_url = (base_url or SEARCH_URL).rstrip("/")
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def search(self, sentence: str) -> Optional[str]:
+        resp = self._session.get(f"{self.base_url}/search", params={"q": f'"{sentence}"', "num": 1},
+                                 timeout=self.timeout)
+        if resp.status_code == 429:
+            raise RateLimited(_retry_after(resp.headers))
+        resp.raise_for_status()
+        results = resp.json().get("results") or []
+        return results[0].get("url") if results else None
+
+
+_http_backend = None
+
+def get_backend(name: Optional[str] = None, search_fn=None) -> Optional[SearchBackend]:
+    """The configured backend, or None if it is unavailable (e.g. library missing)."""
+    global _http_backend
+    name = name or SEARCH_BACKEND
+    if name == "http":
+        # One instance, so its keep-alive session is reused across reviews
+        if _http_backend is None:
+            _http_backend = HttpSearchBackend()
+        return _http_backend
+    if name == "google":
+        return GoogleSearchBackend(search_fn) if search_fn else None
+    raise ValueError(f"Unknown search backend: {name}")
+
+
+# -----------------------
+# Rate limiting & dispatch
+# -----------------------
+class TokenBucket:
+    """
+    Allows `rate` acquisitions per second on average and up to `capacity`
+    back to back. Thread-safe; acquire() sleeps until a token is free.
+    """
+
+    def __init__(self, rate: float = SEARCH_RATE, capacity: int = SEARCH_BURST):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# Shared by every review in the process, so concurrent reviews stay under the provider limit
+_limiter = TokenBucket()
+
+
+def search_with_backoff(backend: SearchBackend, sentence: str, limiter: TokenBucket = _limiter,
+                        retries: int = SEARCH_RETRIES, backoff: float = SEARCH_BACKOFF) -> Optional[str]:
+    """
+    backend.search behind the token bucket; a 429 is retried after
+    max(Retry-After, backoff * 2**attempt) plus jitter, up to `retries` times.
+    """
+    for attempt in range(retries + 1):
+        limiter.acquire()
+        try:
+            return backend.search(sentence)
+        except RateLimited as e:
+            if attempt == retries:
+                raise
+            delay = max(e.retry_after or 0, backoff * (2 ** attempt))
+            time.sleep(delay + random.uniform(0, delay / 4))
+
+
+def search_many(backend: SearchBackend, sentences: List[str], workers: int = SEARCH_WORKERS,
+                limiter: TokenBucket = _limiter) -> List[object]:
+    """
+    Searches all sentences concurrently. Each slot of the result is the hit
+    URL, None (no hit) or the Exception that query ended with.
+    """
+    def one(sentence):
+        try:
+            return search_with_backoff(backend, sentence, limiter)
+        except Exception as e:
+            return e
+
+    if not sentences:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(sentences)))) as pool:
+        return list(pool.map(one, sentences))
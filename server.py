@@ -1,50 +1,24 @@
-from fastapi import FastAPI, File, UploadFile, Form
-import tempfile, os, traceback, time
-import requests
-from typing import Any
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from fastapi.responses import Response, StreamingResponse
+import traceback, time, json, queue, asyncio
+from collections import deque
+from typing import Any, List
 
 # adjust imports to your project layout
-from review_model import review_pdf, generate_final_report
-from online_plagiarism import check_plagiarism_smallseotools
+from review_model import review_pdf_cached, get_review_cache, generate_final_report, parse_stages, resolve_stages
+from online_plagiarism import check_plagiarism_smallseotools, lookup_cache_stats
+import llm_client
+import metrics
+from jobs import JobQueue, QueueFull
+from executors import get_cpu_pool, get_io_pool, run_io, shutdown as shutdown_executors
+from uploads import UploadTooLarge, read_upload, expand_uploads
+from batch_review import review_batch, to_ndjson
 
 app = FastAPI()
+app.add_middleware(metrics.MetricsMiddleware)
+job_queue = JobQueue()
 
 
-# ---------- helper: safe call to Ollama ----------
-def rewrite_with_ollama(text: str):
-    try:
-        payload = {
-            "model": "llama3.1:8b",
-            "prompt": (
-                "Rewrite the following text professionally in a third-person academic tone. "
-                "Return ONLY the rewritten sentence. Do NOT add any explanation or introduction.\n\n"
-                f"TEXT:\n{text}\n\nREWRITE:"
-            ),
-            "stream": False
-        }
-
-        r = requests.post("http://localhost:11434/api/generate", json=payload)
-        j = r.json()
-
-        output = j.get("response") or text
-
-        # Remove any leftover bullshit like "Here is the rewritten text:"
-        remove_phrases = [
-            "Here is the rewritten text:",
-            "Here is the rewritten text in a professional, third-person academic tone:",
-            "Here is the rewritten text in a third-person academic tone:",
-            "Rewritten:",
-            "REWRITE:"
-        ]
-
-        for p in remove_phrases:
-            output = output.replace(p, "")
-
-        return output.strip()
-
-    except Exception:
-        return text
-
 # ---------- helper: safe generate_final_report caller ----------
 def safe_generate_final_report(strengths, weaknesses, improvements, verdict: str, confidence: float) -> str:
     """
@@ -76,143 +50,341 @@ def safe_generate_final_report(strengths, weaknesses, improvements, verdict: str
     return "\n\n".join(parts)
 
 
+# ---------- shared /analyze response builder ----------
+def build_analyze_response(rv, rewrite: str, start_ts: float) -> dict:
+    """
+    Turns a review_pdf result into the JSON schema the Flutter client expects.
+    Rewrites and the report come from the review's own stages; nothing here
+    calls the LLM again.
+    """
+    # Normalize rv to dict
+    if isinstance(rv, dict):
+        data = rv
+    elif isinstance(rv, (list, tuple)):
+        # attempt to map common tuple shapes -> convert into dict
+        # if it's already (extracted, strengths, weaknesses, improvements, final_card)
+        data = {}
+        try:
+            if len(rv) >= 4:
+                # heuristic mapping
+                data["strengths"] = rv[1] if len(rv) > 1 else []
+                data["weaknesses"] = rv[2] if len(rv) > 2 else []
+                data["improvements"] = rv[3] if len(rv) > 3 else []
+                # final_card maybe present as 5th
+                if len(rv) > 4 and isinstance(rv[4], dict):
+                    data["final_card"] = rv[4]
+                    data["final_score"] = rv[4].get("final_score", 0.0)
+                    data["verdict"] = rv[4].get("verdict", "UNKNOWN")
+                    data["confidence"] = rv[4].get("confidence", 0.0)
+                else:
+                    data["final_card"] = {}
+                    data["final_score"] = 0.0
+                    data["verdict"] = "UNKNOWN"
+                    data["confidence"] = 0.0
+            else:
+                # unknown shape -> return error to client
+                return {"error": "Unexpected tuple/list shape from review_pdf", "raw": str(rv)}
+        except Exception as e:
+            return {"error": "Failed to interpret tuple return from review_pdf", "trace": str(e), "raw": str(rv)}
+    else:
+        return {"error": "review_pdf returned unsupported type", "type": str(type(rv))}
+
+    # Extract fields
+    strengths = data.get("strengths", []) or []
+    weaknesses = data.get("weaknesses", []) or []
+    improvements = data.get("improvements", []) or []
+
+    verdict = data.get("verdict", "UNKNOWN")
+    confidence = float(data.get("confidence", 0.0) or 0.0)
+    final_card = data.get("final_card", {})
+    final_score = data.get("final_score", data.get("final_score", 0.0))
+
+    # rewritten lists come from the review's rewrite stage (run with no limit)
+    if (rewrite or "true").lower() == "true" and "rewrite" in data.get("stages", ["rewrite"]):
+        rewritten_strengths = data.get("rewritten_strengths") or strengths
+        rewritten_weaknesses = data.get("rewritten_weaknesses") or weaknesses
+        rewritten_improvements = data.get("rewritten_improvements") or improvements
+    else:
+        rewritten_strengths = strengths
+        rewritten_weaknesses = weaknesses
+        rewritten_improvements = improvements
+
+    # reuse the review's report; only build one if that stage did not run
+    rewritten_text = data.get("report") or safe_generate_final_report(
+        rewritten_strengths, rewritten_weaknesses, rewritten_improvements, verdict, confidence
+    )
+
+    # optional plagiarism: use provided function on full text if present
+    plag_percent = data.get("plagiarism_percent", None)
+    plag_risk = data.get("plagiarism_risk", None)
+    plag_sources = data.get("plagiarism_sources", None)
+    if plag_percent is None:
+        try:
+            full_text = data.get("full_text", "") or data.get("report", "") or ""
+            p_p, p_orig, p_risk, p_sources = check_plagiarism_smallseotools(full_text)  # plain search, no LLM
+            if isinstance(p_p, int):
+                plag_percent = p_p
+            if isinstance(p_risk, str):
+                plag_risk = p_risk
+            plag_sources = p_sources
+        except Exception:
+            plag_percent = 0
+            plag_risk = "UNAVAILABLE"
+
+    duration = time.time() - start_ts
+
+    return {
+        "verdict": verdict,
+        "final_card": final_card,
+        "final_score": final_score,
+        "confidence": confidence,
+
+        "strengths": strengths,
+        "weaknesses": weaknesses,
+        "improvements": improvements,
+
+        "rewritten_strengths": rewritten_strengths,
+        "rewritten_weaknesses": rewritten_weaknesses,
+        "rewritten_improvements": rewritten_improvements,
+
+        "rewritten_text": rewritten_text,
+
+        "plagiarism_percent": plag_percent or 0,
+        "plagiarism_risk": plag_risk or "UNAVAILABLE",
+        "plagiarism_sources": plag_sources or [],
+
+        "meta": {
+            "runtime_seconds": round(duration, 2),
+            "rewrote": (rewrite or "true").lower() == "true",
+            "stages": data.get("stages", []),
+            # per-stage wall/CPU seconds and the stages that bounded latency (from the review's run)
+            "stage_timings": data.get("meta", {}).get("stages", {}),
+            "critical_path": data.get("meta", {}).get("critical_path", {}),
+            "cache": get_review_cache().stats(),
+            "plagiarism_lookup": data.get("plagiarism_lookup", {}),
+            "plagiarism_cache": lookup_cache_stats()
+        }
+    }
+
+
 # ---------- main /analyze ----------
 @app.post("/analyze")
-async def analyze_pdf(file: UploadFile = File(...), rewrite: str = Form("true")) -> Any:
+async def analyze_pdf(file: UploadFile = File(...), rewrite: str = Form("true"),
+                      no_cache: str = Form("false"), stages: str = Form("")) -> Any:
     """
     Returns JSON expected by Flutter. Defensive and logs errors gracefully.
+    `stages` (comma-separated, default all) limits which pipeline stages run.
     """
     start_ts = time.time()
-    tmp_folder = None
+    content = await read_pdf_upload(file)
+    stage_list = check_stages(stages, rewrite)
     try:
-        tmp_folder = tempfile.mkdtemp()
-        file_path = os.path.join(tmp_folder, file.filename)
-        with open(file_path, "wb") as f:
-            f.write(await file.read())
-
-        # call review model
-        rv = review_pdf(file_path)
-
-        # Normalize rv to dict
-        if isinstance(rv, dict):
-            data = rv
-        elif isinstance(rv, (list, tuple)):
-            # attempt to map common tuple shapes -> convert into dict
-            # if it's already (extracted, strengths, weaknesses, improvements, final_card)
-            data = {}
-            try:
-                if len(rv) >= 4:
-                    # heuristic mapping
-                    data["strengths"] = rv[1] if len(rv) > 1 else []
-                    data["weaknesses"] = rv[2] if len(rv) > 2 else []
-                    data["improvements"] = rv[3] if len(rv) > 3 else []
-                    # final_card maybe present as 5th
-                    if len(rv) > 4 and isinstance(rv[4], dict):
-                        data["final_card"] = rv[4]
-                        data["final_score"] = rv[4].get("final_score", 0.0)
-                        data["verdict"] = rv[4].get("verdict", "UNKNOWN")
-                        data["confidence"] = rv[4].get("confidence", 0.0)
-                    else:
-                        data["final_card"] = {}
-                        data["final_score"] = 0.0
-                        data["verdict"] = "UNKNOWN"
-                        data["confidence"] = 0.0
-                else:
-                    # unknown shape -> return error to client
-                    return {"error": "Unexpected tuple/list shape from review_pdf", "raw": str(rv)}
-            except Exception as e:
-                return {"error": "Failed to interpret tuple return from review_pdf", "trace": str(e), "raw": str(rv)}
-        else:
-            return {"error": "review_pdf returned unsupported type", "type": str(type(rv))}
-
-        # Extract fields
-        strengths = data.get("strengths", []) or []
-        weaknesses = data.get("weaknesses", []) or []
-        improvements = data.get("improvements", []) or []
-
-        verdict = data.get("verdict", "UNKNOWN")
-        confidence = float(data.get("confidence", 0.0) or 0.0)
-        final_card = data.get("final_card", {})
-        final_score = data.get("final_score", data.get("final_score", 0.0))
-
-        # rewrite lists if requested
-        if (rewrite or "true").lower() == "true":
-            # be careful: large lists -> consider rate limit (we do them sequentially)
-            rewritten_strengths = [rewrite_with_ollama(s) for s in strengths]
-            rewritten_weaknesses = [rewrite_with_ollama(w) for w in weaknesses]
-            rewritten_improvements = [rewrite_with_ollama(i) for i in improvements]
-        else:
-            rewritten_strengths = strengths
-            rewritten_weaknesses = weaknesses
-            rewritten_improvements = improvements
-
-        # generate a final human-readable report using safe wrapper
-        rewritten_text = safe_generate_final_report(
-            rewritten_strengths, rewritten_weaknesses, rewritten_improvements, verdict, confidence
-        )
-
-        # optional plagiarism: use provided function on full text if present
-        plag_percent = data.get("plagiarism_percent", None)
-        plag_risk = data.get("plagiarism_risk", None)
-        if plag_percent is None:
-            try:
-                full_text = data.get("full_text", "") or data.get("report", "") or ""
-                p_p, p_orig, p_risk = check_plagiarism_smallseotools(full_text)
-                if isinstance(p_p, int):
-                    plag_percent = p_p
-                if isinstance(p_risk, str):
-                    plag_risk = p_risk
-            except Exception:
-                plag_percent = 0
-                plag_risk = "UNAVAILABLE"
-
-        duration = time.time() - start_ts
-
-        return {
-            "verdict": verdict,
-            "final_card": final_card,
-            "final_score": final_score,
-            "confidence": confidence,
-
-            "strengths": strengths,
-            "weaknesses": weaknesses,
-            "improvements": improvements,
-
-            "rewritten_strengths": rewritten_strengths,
-            "rewritten_weaknesses": rewritten_weaknesses,
-            "rewritten_improvements": rewritten_improvements,
-
-            "rewritten_text": rewritten_text,
-
-            "plagiarism_percent": plag_percent or 0,
-            "plagiarism_risk": plag_risk or "UNAVAILABLE",
-
-            "meta": {
-                "runtime_seconds": round(duration, 2),
-                "rewrote": (rewrite or "true").lower() == "true"
-            }
-        }
+        # The review blocks (CPU work + LLM calls), so it runs on the IO pool
+        # and hands its CPU phase to the process pool; the event loop stays free.
+        def run():
+            rv = review_upload(content, rewrite, no_cache, stage_list)
+            return build_analyze_response(rv, rewrite, start_ts)
+
+        return await run_io(run)
 
     except Exception as e:
         tb = traceback.format_exc()
         print("ERROR in /analyze:", tb)
         return {"error": str(e), "trace": tb}
-    finally:
-        # try cleanup
+
+
+def review_upload(content: bytes, rewrite: str, no_cache: str, stages=None, on_event=None):
+    """
+    Blocking: runs the (cached) review straight from the uploaded bytes,
+    with the CPU-bound phase on the shared process pool. Every strength,
+    weakness and improvement is rewritten once, inside the review.
+    """
+    # call review model (no_cache=true forces a fresh review)
+    use_cache = (no_cache or "false").lower() != "true"
+    return review_pdf_cached(content, rewrite=(rewrite or "true").lower() == "true", rewrite_limit=None,
+                             use_cache=use_cache, on_event=on_event, cpu_pool=get_cpu_pool(), stages=stages)
+
+
+def check_stages(stages: str, rewrite: str = "true"):
+    try:
+        stage_list = parse_stages(stages)
+        resolve_stages(stage_list, rewrite=(rewrite or "true").lower() == "true")
+        return stage_list
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def read_pdf_upload(file: UploadFile) -> bytes:
+    # Chunked read with a size cap; the PDF never touches the disk
+    try:
+        return await read_upload(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+# ---------- streaming /analyze (Server-Sent Events) ----------
+# Recent time-to-first-byte / first-token samples for /analyze/stream/stats
+STREAM_TIMINGS = deque(maxlen=500)
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+
+@app.post("/analyze/stream")
+async def analyze_pdf_stream(file: UploadFile = File(...), rewrite: str = Form("true"),
+                             no_cache: str = Form("false"), stages: str = Form("")):
+    """
+    Same analysis as /analyze, streamed as SSE: a "stage" event per pipeline
+    stage, "token" events with critique/rewrite tokens as Ollama produces
+    them, then one "result" event carrying the /analyze JSON (or "error").
+    """
+    start_ts = time.time()
+    content = await read_pdf_upload(file)
+    stage_list = check_stages(stages, rewrite)
+    events = queue.Queue()
+
+    def on_event(event, data):
+        events.put((event, data))
+
+    def work():
         try:
-            if tmp_folder and os.path.isdir(tmp_folder):
-                # remove file and folder
-                for fname in os.listdir(tmp_folder):
-                    try:
-                        os.remove(os.path.join(tmp_folder, fname))
-                    except Exception:
-                        pass
-                try:
-                    os.rmdir(tmp_folder)
-                except Exception:
-                    pass
-        except Exception:
-            pass
+            rv = review_upload(content, rewrite, no_cache, stage_list, on_event=on_event)
+            events.put(("result", build_analyze_response(rv, rewrite, start_ts)))
+        except Exception as e:
+            tb = traceback.format_exc()
+            print("ERROR in /analyze/stream:", tb)
+            events.put(("error", {"error": str(e), "trace": tb}))
+        finally:
+            events.put(None)
+
+    get_io_pool().submit(work)
+
+    async def stream():
+        ttfb = time.time() - start_ts
+        yield _sse("stage", {"stage": "upload", "bytes": len(content)})
+        first_token = None
+        while True:
+            item = await asyncio.to_thread(events.get)
+            if item is None:
+                break
+            event, data = item
+            if event == "token" and first_token is None:
+                first_token = time.time() - start_ts
+            if event == "result" and isinstance(data.get("meta"), dict):
+                data["meta"]["ttfb_seconds"] = round(ttfb, 4)
+                data["meta"]["first_token_seconds"] = round(first_token, 4) if first_token is not None else None
+            yield _sse(event, data)
+        STREAM_TIMINGS.append({"ttfb": ttfb, "first_token": first_token, "total": time.time() - start_ts})
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/analyze/stream/stats")
+def analyze_stream_stats():
+    samples = list(STREAM_TIMINGS)
+    out = {"count": len(samples)}
+    for metric in ("ttfb", "first_token", "total"):
+        values = [x[metric] for x in samples if x[metric] is not None]
+        out[metric] = {"p50": _percentile(values, 0.5), "p95": _percentile(values, 0.95),
+                       "mean": sum(values) / len(values) if values else None}
+    return out
+
+
+# ---------- batch /analyze: many PDFs (or ZIPs of PDFs), NDJSON out ----------
+@app.post("/analyze/batch")
+async def analyze_batch(files: List[UploadFile] = File(...), rewrite: str = Form("true"),
+                        no_cache: str = Form("false"), stages: str = Form("")):
+    """
+    Streams one NDJSON line per paper as soon as it finishes
+    ({"index", "filename", "status", "seconds", "result" | "error"}, where
+    "result" has the /analyze schema), then a summary line.
+    """
+    start_ts = time.time()
+    try:
+        papers = expand_uploads([(f.filename, await read_upload(f)) for f in files])
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    use_cache = (no_cache or "false").lower() != "true"
+    stage_list = check_stages(stages, rewrite)
+
+    def stream():
+        failed = 0
+        records = review_batch(papers, rewrite=(rewrite or "true").lower() == "true", rewrite_limit=None,
+                               stages=stage_list, use_cache=use_cache,
+                               finish=lambda rv, started: build_analyze_response(rv, rewrite, started))
+        for record in records:
+            failed += record["status"] == "failed"
+            yield to_ndjson(record)
+        yield to_ndjson({"summary": True, "papers": len(papers), "failed": failed,
+                         "runtime_seconds": round(time.time() - start_ts, 2)})
+
+    # Sync generator -> Starlette iterates it in a worker thread
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+# ---------- job mode: submit now, poll GET /jobs/{id} ----------
+@app.post("/jobs")
+async def submit_job(file: UploadFile = File(...), rewrite: str = Form("true"),
+                     no_cache: str = Form("false"), stages: str = Form("")):
+    """
+    Queues the analysis and returns a job id immediately. The finished job's
+    "result" has the same schema as /analyze.
+    """
+    filename = file.filename
+    content = await read_pdf_upload(file)
+    stage_list = check_stages(stages, rewrite)
+
+    def run(on_event):
+        start_ts = time.time()
+        rv = review_upload(content, rewrite, no_cache, stage_list, on_event=on_event)
+        return build_analyze_response(rv, rewrite, start_ts)
+
+    try:
+        job = job_queue.submit(run, label=filename)
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}
+
+@app.get("/jobs/stats")
+def job_stats():
+    return job_queue.stats()
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job id")
+    return job.to_dict()
+
+
+# ---------- liveness + pool lifecycle ----------
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+@app.on_event("shutdown")
+async def _shutdown_pools():
+    shutdown_executors()
+    await llm_client.aclose()
+    llm_client.close()
+
+
+# ---------- review cache counters ----------
+@app.get("/cache/stats")
+def cache_stats():
+    return {"reviews": get_review_cache().stats(), "llm": llm_client.cache_stats(),
+            "plagiarism": lookup_cache_stats()}
+
+
+# ---------- Prometheus metrics ----------
+@app.get("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 
 # ---------- small /ask helper for manual testing ----------
@@ -223,13 +395,8 @@ class AskBody(BaseModel):
 @app.post("/ask")
 def ask_model(body: AskBody):
     try:
-        r = requests.post("http://localhost:11434/api/generate",
-                          json={"model": "llama3.1:8b", "prompt": body.prompt, "stream": False},
-                          timeout=30)
-        try:
-            return r.json()
-        except:
-            return {"text": r.text}
+        return llm_client.generate({"model": "llama3.1:8b", "prompt": body.prompt},
+                                   call_site="ask", timeout=30)
     except Exception as e:
         return {"error": str(e)}
 if __name__ == "__main__":
@@ -0,0 +1,31 @@
+import os
+import sys
+import tempfile
+
+# Before any repo module is imported: caches go to a throwaway directory
+os.environ["REVIEWER_CACHE_DIR"] = tempfile.mkdtemp(prefix="review_cache_tests_")
+os.environ["REVIEWER_LLM_CACHE"] = "0"
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import pytest
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    """Canned LLM answers and a web search that finds nothing."""
+    import canned_llm
+    import llm_client
+    import online_plagiarism
+    import search_backends
+    monkeypatch.setattr(llm_client, "generate", canned_llm.stub_generate)
+    monkeypatch.setattr(online_plagiarism, "search", lambda query, **kwargs: [])
+    monkeypatch.setattr(search_backends._limiter, "rate", 1e6)
+
+
+@pytest.fixture(scope="session")
+def paper_pdf() -> bytes:
+    from synthetic_paper import make_paper
+    return make_paper(2, seed=0)[0]
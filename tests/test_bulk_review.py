@@ -0,0 +1,30 @@
+import json
+
+import canned_llm
+import llm_client
+
+import bulk_review
+
+
+def _statuses(out):
+    with open(out, encoding="utf-8") as f:
+        return [json.loads(line)["status"] for line in f]
+
+
+def test_degraded_reviews_are_redone_on_the_next_run(offline, monkeypatch, tmp_path, paper_pdf):
+    (tmp_path / "papers").mkdir()
+    (tmp_path / "papers" / "a.pdf").write_bytes(paper_pdf)
+    out = str(tmp_path / "reviews.jsonl")
+
+    def ollama_down(payload, call_site="default", **kwargs):
+        raise ConnectionError("Ollama is not running")
+
+    monkeypatch.setattr(llm_client, "generate", ollama_down)
+    bulk_review.main([str(tmp_path / "papers"), "--out", out, "--no-cache"])
+    assert _statuses(out) == ["degraded"]
+    assert bulk_review.completed_hashes(out) == set()
+
+    monkeypatch.setattr(llm_client, "generate", canned_llm.stub_generate)
+    bulk_review.main([str(tmp_path / "papers"), "--out", out])
+    assert _statuses(out) == ["degraded", "done"]
+    assert len(bulk_review.completed_hashes(out)) == 1
@@ -0,0 +1,19 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import llm_client
+
+pytest.importorskip("httpx")
+
+
+async def pooled_client():
+    return llm_client._get_async_client()[0]
+
+
+@pytest.mark.parametrize("module", ["server", "api"])
+def test_shutdown_closes_the_async_client(module):
+    app = __import__(module).app
+    with TestClient(app) as client:
+        pooled = client.portal.call(pooled_client)
+        assert not pooled.is_closed
+    assert pooled.is_closed
@@ -0,0 +1,72 @@
+import hashlib
+from types import SimpleNamespace
+
+import pytest
+
+import online_plagiarism
+import search_backends
+from pdf_extraction import extract_text_from_pdf
+from review_cache import ReviewCache
+from review_model import is_cacheable, review_pdf
+
+
+def fake_search(query, num_results=1, advanced=True):
+    # Roughly half the sentences are "found online", decided by their text
+    if hashlib.sha256(query.encode("utf-8")).digest()[0] % 2:
+        return [SimpleNamespace(url="https://example.org/" + query[1:20].replace(" ", "-"))]
+    return []
+
+
+class OtherBackend(search_backends.GoogleSearchBackend):
+    name = "other"
+
+
+@pytest.fixture
+def web_check(monkeypatch, tmp_path):
+    """A fresh lookup cache and a fake search engine; returns the searched sentences."""
+    searched = []
+
+    def search(query, **kwargs):
+        searched.append(query)
+        return fake_search(query, **kwargs)
+
+    monkeypatch.setattr(online_plagiarism, "search", search)
+    monkeypatch.setattr(search_backends._limiter, "rate", 1e6)
+    monkeypatch.setattr(online_plagiarism, "LOOKUP_CACHE_ENABLED", True)
+    monkeypatch.setattr(online_plagiarism, "_lookup_cache",
+                        ReviewCache(directory=str(tmp_path), filename="lookups.sqlite3"))
+    return searched
+
+
+def test_cold_and_warm_cache_give_the_same_score(web_check, paper_pdf):
+    text = extract_text_from_pdf(paper_pdf)
+    cold_stats, warm_stats = {}, {}
+    cold = online_plagiarism.check_plagiarism_google(text, stats=cold_stats)
+    warm = online_plagiarism.check_plagiarism_google(text, stats=warm_stats)
+
+    assert cold_stats["searched"] == cold_stats["sampled"] > 0
+    assert warm_stats["cached"] == warm_stats["sampled"] and warm_stats["searched"] == 0
+    assert cold[:3] == warm[:3]
+
+
+def test_sample_does_not_depend_on_the_backend(web_check, paper_pdf, monkeypatch):
+    text = extract_text_from_pdf(paper_pdf)
+    google = online_plagiarism.check_plagiarism_google(text)
+    google_queries = sorted(web_check)
+    web_check.clear()
+
+    monkeypatch.setattr(search_backends, "get_backend",
+                        lambda name=None, search_fn=None: OtherBackend(search_fn))
+    other = online_plagiarism.check_plagiarism_google(text)
+
+    # Fingerprints differ per backend, so nothing is cached, but the same sentences are picked
+    assert sorted(web_check) == google_queries
+    assert other[:3] == google[:3]
+
+
+def test_missing_search_library_counts_as_degraded(offline, paper_pdf, monkeypatch):
+    monkeypatch.setattr(online_plagiarism, "search", None)
+    result = review_pdf(paper_pdf, stages=["plagiarism"])
+    assert result["plagiarism_risk"] == "MISSING_LIB"
+    assert result["meta"]["degraded"] == ["plagiarism"]
+    assert not is_cacheable(result)
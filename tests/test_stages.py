@@ -0,0 +1,38 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from review_model import resolve_stages, review_pdf
+
+
+def test_report_pulls_in_transitive_dependencies():
+    assert resolve_stages(["report"]) == ("extract", "heuristics", "report")
+    assert resolve_stages(["rewrite"]) == ("extract", "heuristics", "rewrite")
+
+
+def test_extract_is_always_included():
+    assert resolve_stages(["plagiarism"])[0] == "extract"
+
+
+def test_rewrite_only_with_rewrite_off_is_rejected():
+    with pytest.raises(ValueError, match="No stages to run"):
+        resolve_stages(["rewrite"], rewrite=False)
+
+
+def test_empty_selection_is_rejected():
+    with pytest.raises(ValueError, match="No stages to run"):
+        resolve_stages([])
+
+
+def test_review_pdf_runs_report_only(offline, paper_pdf):
+    result = review_pdf(paper_pdf, stages=["report"])
+    assert result["stages"] == ["extract", "heuristics", "report"]
+    assert result["report"]
+
+
+@pytest.mark.parametrize("module", ["server", "api"])
+def test_analyze_rejects_rewrite_only_with_rewrite_off(module, paper_pdf):
+    app = __import__(module).app
+    r = TestClient(app).post("/analyze", files={"file": ("p.pdf", paper_pdf, "application/pdf")},
+                             data={"stages": "rewrite", "rewrite": "false"})
+    assert r.status_code == 400
+    assert "No stages to run" in r.json()["detail"]
@@ -0,0 +1,76 @@
+import io
+import os
+import zipfile
+from typing import List, Tuple
+
+# -----------------------
+# Upload limits
+# -----------------------
+MAX_UPLOAD_BYTES = int(os.environ.get("REVIEWER_MAX_UPLOAD_MB", "50")) * 1024 * 1024
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+async def read_upload(upload, limit: int = MAX_UPLOAD_BYTES) -> bytes:
+    """
+    Reads an UploadFile into memory in chunks, stopping as soon as it
+    exceeds `limit` bytes instead of buffering the whole body first.
+    """
+    chunks, size = [], 0
+    while True:
+        chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > limit:
+            raise UploadTooLarge(f"Upload exceeds the {limit / (1024 * 1024):g} MB limit")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+# -----------------------
+# Batch uploads (several PDFs and/or ZIP archives)
+# -----------------------
+BATCH_MAX_FILES = int(os.environ.get("REVIEWER_BATCH_MAX_FILES", "200"))
+
+
+def is_zip(content: bytes) -> bool:
+    return content[:4] == b"PK\x03\x04"
+
+
+def expand_uploads(items: List[Tuple[str, bytes]], limit: int = MAX_UPLOAD_BYTES,
+                   max_files: int = BATCH_MAX_FILES) -> List[Tuple[str, bytes]]:
+    """
+    Turns uploaded (filename, bytes) pairs into a flat list of PDFs: ZIP
+    archives are unpacked (only *.pdf members), everything else is kept
+    as is. Each PDF is held to `limit` bytes, the batch to `max_files`.
+    """
+    pdfs = []
+    for name, content in items:
+        if not is_zip(content):
+            pdfs.append((name, content))
+            continue
+        try:
+            archive = zipfile.ZipFile(io.BytesIO(content))
+        except zipfile.BadZipFile as e:
+            raise ValueError(f"{name}: {e}")
+        with archive:
+            for info in archive.infolist():
+                member = info.filename
+                if info.is_dir() or not member.lower().endswith(".pdf") or "__MACOSX/" in member:
+                    continue
+                # Check the declared size before inflating anything
+                if info.file_size > limit:
+                    raise UploadTooLarge(f"{name}/{member} exceeds the {limit / (1024 * 1024):g} MB limit")
+                pdfs.append((f"{name}/{member}", archive.read(info)))
+                if len(pdfs) > max_files:
+                    break
+        if len(pdfs) > max_files:
+            break
+
+    if len(pdfs) > max_files:
+        raise UploadTooLarge(f"Batch exceeds {max_files} files")
+    return pdfs